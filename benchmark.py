@@ -0,0 +1,219 @@
+"""Mesures de performance des étapes principales sur des jeux synthétiques de taille croissante.
+
+    python benchmark.py run --scales 1 10 100 --output benchmark_results.json
+    python benchmark.py compare benchmark_baseline.json benchmark_results.json --threshold 0.2
+
+Chaque étape est mesurée dans un processus neuf, pour que le pic de mémoire soit bien celui de l'étape.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from f1sim.paths import DATA_DIR_ENV
+from f1sim.synthetic import generate_dataset
+
+DEFAULT_SCALES = [1, 10]
+DEFAULT_REPEAT = 3
+DEFAULT_WORK_DIR = 'bench_data'
+# Écart relatif au-delà duquel une mesure est signalée comme régression
+DEFAULT_THRESHOLD = 0.2
+
+STAGES = ['clean_lap_times', 'clean_lap_times_streaming', 'filter_data_for_seasons', 'create_plots', 'history_stats',
+          'simulate_race_with_probability_and_weather', 'generate_dynamic_race_graph']
+
+def _quiet(function, *args):
+    # Les étapes affichent des aperçus (print, avertissements Streamlit hors session) : hors mesure
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return function(*args)
+
+def _seasons_tables(data_dir):
+    from clean import clean_table
+    names = ['races', 'results', 'seasons', 'constructors', 'drivers']
+    return [clean_table(pd.read_csv(os.path.join(data_dir, f'{name}.csv'))) for name in names]
+
+def setup_stage(stage, data_dir, work_dir):
+    # Prépare une étape ; retourne (fonction mesurée, nombre d'éléments traités par appel, unité)
+    if stage == 'clean_lap_times':
+        import clean
+        path = os.path.join(data_dir, 'lap_times.csv')
+        return (lambda: _quiet(clean.clean_lap_times, path)), clean.count_rows(path, 'raceId'), 'lignes'
+    if stage == 'clean_lap_times_streaming':
+        import clean
+        path = os.path.join(data_dir, 'lap_times.csv')
+        output = os.path.join(work_dir, 'cleaned_lap_times.csv')
+        return ((lambda: clean.clean_lap_times_streaming(path, output, snapshot=False)),
+                clean.count_rows(path, 'raceId'), 'lignes')
+    if stage in ('filter_data_for_seasons', 'create_plots'):
+        import projet
+        tables = _seasons_tables(data_dir)
+        years = sorted(tables[2]['year'].unique().tolist())
+        if stage == 'filter_data_for_seasons':
+            return (lambda: _quiet(projet.filter_data_for_seasons, *tables, years)), len(tables[1]), 'lignes'
+        races_filtered, results_filtered = _quiet(projet.filter_data_for_seasons, *tables, years)
+        # Totaux tirés du cube des points, comme dans l'application
+        totals = projet.season_views(*tables).totals(years)
+        return ((lambda: projet.create_plots(races_filtered, results_filtered, totals)), len(results_filtered),
+                'lignes')
+    if stage == 'history_stats':
+        import clean
+        from f1sim.analytics import history_stats_in
+        laps = clean.count_rows(os.path.join(data_dir, 'lap_times.csv'), 'raceId')
+        return (lambda: history_stats_in(data_dir)), laps, 'lignes'
+    # Simulateur : les chemins des tables sont lus à l'import, depuis le répertoire de données
+    os.environ[DATA_DIR_ENV] = data_dir
+    import meteo
+    race_id = int(pd.read_csv(os.path.join(data_dir, 'races.csv'), usecols=['raceId'])['raceId'].iloc[0])
+    circuit = next(iter(meteo.circuit_mapping))
+    if stage == 'simulate_race_with_probability_and_weather':
+        return (lambda: meteo.simulate_race_with_probability_and_weather(race_id, circuit)), 1, 'courses'
+    results, _ = meteo.simulate_race_with_probability_and_weather(race_id, circuit)
+    return (lambda: meteo.generate_dynamic_race_graph(results)), 1, 'figures'
+
+def measure_stage(stage, data_dir, repeat=DEFAULT_REPEAT):
+    from clean import peak_rss_mb
+    with tempfile.TemporaryDirectory() as work_dir:
+        run, items, unit = setup_stage(stage, data_dir, work_dir)
+        rss_before = peak_rss_mb()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        rss_after = peak_rss_mb()
+    best = min(timings)
+    return {
+        'stage': stage,
+        'items': items,
+        'unit': unit,
+        # Premier appel (tables à charger) et meilleur appel (caches chauds)
+        'first_seconds': timings[0],
+        'seconds': best,
+        'median_seconds': statistics.median(timings),
+        'items_per_second': items / best if best > 0 else float('inf'),
+        'peak_rss_mb': rss_after,
+        'stage_rss_mb': rss_after - rss_before if rss_after is not None else None,
+    }
+
+def ensure_dataset(work_dir, scale, seed=0):
+    # Jeu de données généré une fois par échelle, réutilisé ensuite
+    directory = os.path.join(work_dir, f'x{scale}')
+    manifest = os.path.join(directory, 'dataset.json')
+    if not os.path.exists(manifest):
+        start = time.perf_counter()
+        counts = generate_dataset(directory, scale, seed)
+        with open(manifest, 'w') as f:
+            json.dump({'scale': scale, 'seed': seed, 'rows': counts}, f, indent=2)
+        print(f"[bench] jeu x{scale} généré en {time.perf_counter() - start:.1f} s ({counts['lap_times.csv']:,} tours)")
+    return directory
+
+def run_benchmarks(scales=DEFAULT_SCALES, stages=STAGES, repeat=DEFAULT_REPEAT, work_dir=DEFAULT_WORK_DIR):
+    results = []
+    for scale in scales:
+        directory = ensure_dataset(work_dir, scale)
+        for stage in stages:
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), 'stage', stage,
+                                        '--data-dir', os.path.abspath(directory), '--repeat', str(repeat)],
+                                       capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            if completed.returncode != 0:
+                print(f"[bench] x{scale} {stage} : échec\n{completed.stderr}", file=sys.stderr)
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            result['scale'] = scale
+            results.append(result)
+            print(f"[bench] x{scale:<5}{stage:<45}{result['seconds'] * 1000:>10.1f} ms"
+                  f"{result['items_per_second']:>14,.0f} {result['unit']}/s"
+                  f"{result['peak_rss_mb'] or 0:>10.1f} Mo")
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+def compare_runs(baseline, current, threshold=DEFAULT_THRESHOLD):
+    # Une ligne par (échelle, étape) présente dans les deux fichiers ; régression si le temps à froid (premier appel),
+    # le temps à chaud (meilleur appel) ou la mémoire de l'étape augmente de plus de threshold (en relatif). Le
+    # meilleur appel est souvent servi par les caches (tables, vues par saisons) : seul le premier mesure le calcul
+    reference = {(r['scale'], r['stage']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        base = reference.get((result['scale'], result['stage']))
+        if base is None:
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] > 0 else float('inf')
+        cold_ratio = None
+        if result.get('first_seconds') is not None and base.get('first_seconds'):
+            cold_ratio = result['first_seconds'] / base['first_seconds']
+        memory_ratio = None
+        if result.get('stage_rss_mb') is not None and base.get('stage_rss_mb'):
+            # Les écarts de quelques Mo ne sont pas significatifs
+            memory_ratio = max(result['stage_rss_mb'], 1.0) / max(base['stage_rss_mb'], 1.0)
+        regression = any(ratio is not None and ratio > 1 + threshold
+                         for ratio in (time_ratio, cold_ratio, memory_ratio))
+        rows.append({'scale': result['scale'], 'stage': result['stage'], 'baseline_seconds': base['seconds'],
+                     'seconds': result['seconds'], 'time_ratio': time_ratio, 'cold_ratio': cold_ratio,
+                     'memory_ratio': memory_ratio, 'regression': regression})
+    return rows
+
+def format_comparison(rows):
+    lines = [f"{'échelle':<9}{'étape':<45}{'référence (ms)':>16}{'actuel (ms)':>13}{'temps':>9}{'à froid':>9}"
+             f"{'mémoire':>9}"]
+    for row in rows:
+        cold = f"x{row['cold_ratio']:.2f}" if row.get('cold_ratio') is not None else "-"
+        memory = f"x{row['memory_ratio']:.2f}" if row['memory_ratio'] is not None else "-"
+        flag = "  RÉGRESSION" if row['regression'] else ""
+        lines.append(f"x{row['scale']:<8}{row['stage']:<45}{row['baseline_seconds'] * 1000:>16.1f}"
+                     f"{row['seconds'] * 1000:>13.1f}{'x' + format(row['time_ratio'], '.2f'):>9}{cold:>9}"
+                     f"{memory:>9}{flag}")
+    return "\n".join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance sur des jeux synthétiques.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Mesurer toutes les étapes")
+    run.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="Échelles (1, 10, 100, 1000)")
+    run.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    run.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    run.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="Dossier des jeux générés")
+    run.add_argument('--output', default='benchmark_results.json')
+    compare = commands.add_parser('compare', help="Comparer une mesure à une référence")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    stage = commands.add_parser('stage', help="Mesurer une étape (processus enfant de run)")
+    stage.add_argument('name', choices=STAGES)
+    stage.add_argument('--data-dir', required=True)
+    stage.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == 'stage':
+        print(json.dumps(measure_stage(args.name, args.data_dir, args.repeat)))
+    elif args.command == 'run':
+        report = run_benchmarks(args.scales, args.stages, args.repeat, args.work_dir)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[bench] Résultats écrits dans {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        rows = compare_runs(baseline, current, args.threshold)
+        print(format_comparison(rows))
+        sys.exit(1 if any(row['regression'] for row in rows) else 0)
@@ -1,56 +1,503 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 import pandas as pd
 
-def clean_lap_times(file_path):
-    # Lire le fichier CSV
-    df = pd.read_csv(file_path)
-    
-    # Afficher les premières lignes et les noms des colonnes du DataFrame pour inspection
-    print("Colonnes disponibles :", df.columns)
-    print(df.head())
-    
-    # Exemple de nettoyage (à adapter selon les besoins spécifiques)
+from f1sim.lap_tensor import write_lap_tensor
+from f1sim.loader import clean_coordinates
+from f1sim.store import snapshot_csv, snapshot_path, snapshot_supported, to_compact_dtypes, write_snapshot
+from f1sim.times import parse_time_column
+from f1sim.weather import race_weather_features
+
+# Colonnes conservées pour les temps au tour
+LAP_TIMES_COLUMNS = ['raceId', 'driverId', 'lap', 'time']
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Saisons conservées dans temps_par_courses.csv
+TEMPS_PAR_COURSES_YEARS = [2023, 2024]
+
+# Tables lues par les applications, converties en instantanés Parquet lorsqu'elles sont présentes
+SNAPSHOT_TABLES = ['cleaned_races.csv', 'cleaned_results.csv', 'cleaned_seasons.csv', 'cleaned_constructors.csv',
+                   'cleaned_drivers.csv', 'cleaned_qualifying.csv', 'cleaned_circuits.csv', 'cleaned_weather_meteo.csv',
+                   'temps_par_courses.csv']
+
+def peak_rss_mb():
+    # Pic de mémoire résidente du processus (None si indisponible, par exemple sous Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS et en kilo-octets sous Linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def clean_lap_times_frame(df):
     # 1. Supprimer les colonnes inutiles
-    columns_to_keep = ['raceId', 'driverId', 'lap', 'time']  # Garder uniquement les colonnes nécessaires
-    df = df[columns_to_keep]
+    df = df[LAP_TIMES_COLUMNS]
     
-    # 2. Traiter les valeurs manquantes (exemple : supprimer les lignes avec des valeurs manquantes)
-    df = df.dropna()
+    # 2. Traiter les valeurs manquantes : les lignes incomplètes sont écartées avec les temps invalides
+    missing = df.isna().any(axis=1)
     
     # 3. Convertir les types de données
-    # Convertir 'lap' en entier
-    df['lap'] = df['lap'].astype(int)
+    # Convertir le temps de 'minute:seconde.milliseconde' en millisecondes, sur toute la colonne d'un coup
+    milliseconds = parse_time_column(df['time'])
+    invalid = missing | milliseconds.isna()
     
-    # Fonction pour convertir le temps de 'minute:seconde.milliseconde' en millisecondes
-    def time_to_ms(time_str):
-        try:
-            # Assurer que le temps suit le format attendu
-            if ':' in time_str:
-                parts = time_str.split(':')
-                if len(parts) == 2:
-                    minutes, seconds = parts
-                    seconds, milliseconds = seconds.split('.')
-                    return int(minutes) * 60000 + int(seconds) * 1000 + int(milliseconds)
-                else:
-                    raise ValueError("Format de temps inattendu.")
-            else:
-                raise ValueError("Format de temps inattendu.")
-        except Exception as e:
-            print(f"Erreur lors de la conversion de '{time_str}': {e}")
-            return None  # Retourner None pour les valeurs non valides
-    
-    # Appliquer la fonction de conversion et gérer les erreurs
-    df['time'] = df['time'].apply(time_to_ms)
-    
-    # Supprimer les lignes avec des valeurs non convertibles
-    df = df.dropna(subset=['time'])
+    # Regrouper les lignes non convertibles dans un seul DataFrame au lieu de les afficher une à une
+    rejected = df[invalid].copy()
+    rejected['motif'] = 'temps invalide'
+    rejected.loc[missing[invalid], 'motif'] = 'valeur manquante'
+    
+    df = df[~invalid].copy()
+    # Types fixes d'un bloc à l'autre (une valeur manquante aurait rendu la colonne flottante)
+    df[['raceId', 'driverId', 'lap']] = df[['raceId', 'driverId', 'lap']].astype(int)
+    df['time'] = milliseconds[~invalid].astype('int64')
     
     # 4. Normaliser les valeurs
     # Convertir les noms de colonnes en minuscules
     df.columns = [col.lower() for col in df.columns]
+    rejected.columns = [col.lower() for col in rejected.columns]
+    
+    return df, rejected
+
+def clean_lap_times(file_path):
+    # Lire le fichier CSV
+    df = pd.read_csv(file_path)
     
-    return df
+    # Afficher les premières lignes et les noms des colonnes du DataFrame pour inspection
+    print("Colonnes disponibles :", df.columns)
+    print(df.head())
+    
+    return clean_lap_times_frame(df)
+
+class _ParquetSink:
+    # Écriture incrémentale d'un fichier Parquet aux types compacts, un row group par bloc
+    def __init__(self, path, append=False):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._pq = pq
+        self.path = str(path)
+        # Parquet ne permet pas l'ajout : les nouveaux blocs passent par un fichier temporaire fusionné à la fermeture
+        self.append = append and os.path.exists(self.path)
+        self.write_path = self.path + '.new' if self.append else self.path
+        self.writer = None
+
+    def write(self, df):
+        table = self._pa.Table.from_pandas(to_compact_dtypes(df), preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.write_path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        if self.append:
+            merged = self._pa.concat_tables([self._pq.read_table(self.path), self._pq.read_table(self.write_path)],
+                                            promote_options='default')
+            self._pq.write_table(merged, self.write_path)
+            os.replace(self.write_path, self.path)
+
+class _CsvSink:
+    # Ajout en fin de fichier CSV, l'en-tête n'est écrit qu'au premier bloc
+    def __init__(self, path, append=False):
+        self.path = path
+        self.header_written = append and os.path.exists(path)
+
+    def write(self, df):
+        df.to_csv(self.path, mode='a' if self.header_written else 'w', header=not self.header_written, index=False)
+        self.header_written = True
 
-# Nettoyer le fichier 'lap_times.csv' et sauvegarder le résultat
-lap_times_df = clean_lap_times('lap_times.csv')
-lap_times_df.to_csv('cleaned_lap_times.csv', index=False)
-print('Nettoyage terminé pour lap_times.csv.')
+    def close(self):
+        pass
+
+def open_sink(path, append=False):
+    if str(path).endswith('.parquet'):
+        return _ParquetSink(path, append)
+    return _CsvSink(path, append)
+
+# Empreintes des lignes source : somme modulo 2**64, indépendante de l'ordre et additive d'un bloc à l'autre
+HASH_MODULUS = 2 ** 64
+HASH_NUMERIC_COLUMNS = ['raceId', 'driverId', 'lap']
+
+def source_hash(chunk):
+    # Empreinte des lignes d'un bloc source ; les identifiants sont ramenés en flottants pour qu'un même fichier donne
+    # la même empreinte quels que soient les types inférés bloc par bloc (5 ou 5.0 selon les valeurs manquantes)
+    if chunk.empty:
+        return 0
+    normalized = pd.DataFrame({column: pd.to_numeric(chunk[column], errors='coerce').astype('float64')
+                               for column in HASH_NUMERIC_COLUMNS})
+    normalized['time'] = chunk['time'].astype('string')
+    return int(pd.util.hash_pandas_object(normalized, index=False).sum()) % HASH_MODULUS
+
+def clean_lap_times_streaming(file_path, output_path, rejected_path=None, chunksize=DEFAULT_CHUNKSIZE,
+                              snapshot=True, min_raceid=None, append=False):
+    # Nettoyage bloc par bloc : la mémoire reste bornée par la taille d'un bloc, quelle que soit la taille du fichier
+    # Avec min_raceid, seules les courses d'identifiant strictement supérieur sont traitées
+    start = time.perf_counter()
+    sinks = [open_sink(output_path, append)]
+    # L'instantané Parquet est alimenté en même temps que la sortie CSV, sans relecture
+    if snapshot and not str(output_path).endswith('.parquet') and snapshot_supported():
+        sinks.append(_ParquetSink(snapshot_path(output_path), append))
+    rejected_sink = open_sink(rejected_path, append) if rejected_path else None
+    rows_read = rows_written = rows_rejected = 0
+    rows_hash = 0
+    max_raceid = min_raceid
+    try:
+        for chunk in pd.read_csv(file_path, usecols=LAP_TIMES_COLUMNS, chunksize=chunksize):
+            if min_raceid is not None:
+                chunk = chunk[chunk['raceId'] > min_raceid]
+                if chunk.empty:
+                    continue
+            chunk_max = chunk['raceId'].max()
+            if pd.notna(chunk_max) and (max_raceid is None or chunk_max > max_raceid):
+                max_raceid = int(chunk_max)
+            cleaned, rejected = clean_lap_times_frame(chunk)
+            rows_hash = (rows_hash + source_hash(chunk[chunk['raceId'].notna()])) % HASH_MODULUS
+            rows_read += len(chunk)
+            rows_written += len(cleaned)
+            rows_rejected += len(rejected)
+            for sink in sinks:
+                sink.write(cleaned)
+            if rejected_sink is not None and not rejected.empty:
+                rejected_sink.write(rejected)
+    finally:
+        for sink in sinks:
+            sink.close()
+        if rejected_sink is not None:
+            rejected_sink.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'rows_read': rows_read,
+        'rows_written': rows_written,
+        'rows_rejected': rows_rejected,
+        'max_raceid': max_raceid,
+        'source_hash': rows_hash,
+        'seconds': elapsed,
+        'rows_per_second': rows_read / elapsed if elapsed > 0 else float('nan'),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def watermark_path(output_path):
+    return f"{output_path}.watermark.json"
+
+def read_watermark(output_path):
+    # État du dernier nettoyage : plus grand raceId traité, nombres de lignes source / nettoyées et empreinte des
+    # lignes source jusqu'à ce raceId
+    path = watermark_path(output_path)
+    if not os.path.exists(path) or not os.path.exists(output_path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def write_watermark(output_path, state):
+    with open(watermark_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+CLEANED_COLUMNS = [column.lower() for column in LAP_TIMES_COLUMNS]
+
+def cleaned_hash(df):
+    # Empreinte des lignes nettoyées, identique pour la sortie CSV et son instantané (types ramenés en int64)
+    if df.empty:
+        return 0
+    normalized = pd.DataFrame({column: df[column].to_numpy(dtype='int64') for column in CLEANED_COLUMNS})
+    return int(pd.util.hash_pandas_object(normalized, index=False).sum()) % HASH_MODULUS
+
+def summarize_cleaned(file_path, chunksize=DEFAULT_CHUNKSIZE):
+    # Nombre de lignes et empreinte d'une sortie nettoyée (CSV par blocs, Parquet par lots)
+    rows = 0
+    rows_hash = 0
+    if str(file_path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize,
+                                                                                       columns=CLEANED_COLUMNS))
+    else:
+        chunks = pd.read_csv(file_path, usecols=CLEANED_COLUMNS, chunksize=chunksize)
+    for chunk in chunks:
+        rows += len(chunk)
+        rows_hash = (rows_hash + cleaned_hash(chunk)) % HASH_MODULUS
+    return rows, rows_hash
+
+def parquet_rows(path):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).metadata.num_rows
+
+def snapshot_appendable(output_path, state):
+    # L'instantané ne reçoit les nouvelles courses que s'il existe, n'est pas plus ancien que le CSV et contient
+    # exactement les lignes nettoyées du filigrane ; sinon il est reconstruit à partir du CSV complet
+    path = snapshot_path(output_path)
+    if not path.exists() or os.path.getmtime(path) < os.path.getmtime(output_path):
+        return False
+    return parquet_rows(path) == state['cleaned_rows']
+
+def rebuild_snapshot(output_path, chunksize=DEFAULT_CHUNKSIZE):
+    # Instantané réécrit par blocs à partir de la sortie CSV, à mémoire bornée
+    sink = _ParquetSink(snapshot_path(output_path))
+    try:
+        for chunk in pd.read_csv(output_path, chunksize=chunksize):
+            sink.write(chunk)
+    finally:
+        sink.close()
+
+def count_rows(file_path, column, max_value=None, chunksize=DEFAULT_CHUNKSIZE):
+    # Comptage par blocs en ne lisant qu'une colonne
+    if str(file_path).endswith('.parquet'):
+        values = pd.read_parquet(file_path, columns=[column])[column]
+        return int((values <= max_value).sum()) if max_value is not None else len(values)
+    total = 0
+    for chunk in pd.read_csv(file_path, usecols=[column], chunksize=chunksize):
+        total += int((chunk[column] <= max_value).sum()) if max_value is not None else len(chunk)
+    return total
+
+def summarize_source(file_path, max_raceid, chunksize=DEFAULT_CHUNKSIZE):
+    # Nombre de lignes source jusqu'à max_raceid et leur empreinte, en une seule lecture par blocs
+    rows = 0
+    rows_hash = 0
+    for chunk in pd.read_csv(file_path, usecols=LAP_TIMES_COLUMNS, chunksize=chunksize):
+        chunk = chunk[chunk['raceId'] <= max_raceid]
+        rows += len(chunk)
+        rows_hash = (rows_hash + source_hash(chunk)) % HASH_MODULUS
+    return rows, rows_hash
+
+def verify_cleaned_output(file_path, output_path, chunksize=DEFAULT_CHUNKSIZE):
+    # Vérifie que la sortie nettoyée correspond toujours à la source jusqu'au filigrane : même nombre de lignes et
+    # même contenu (une valeur corrigée dans une course déjà traitée change l'empreinte)
+    state = read_watermark(output_path)
+    if state is None:
+        return False, "aucun filigrane ou sortie nettoyée absente"
+    if state.get('source_hash') is None:
+        return False, "filigrane sans empreinte de la source"
+    source_rows, rows_hash = summarize_source(file_path, state['max_raceid'], chunksize)
+    if source_rows != state['source_rows']:
+        return False, (f"la source contient {source_rows} lignes jusqu'à la course {state['max_raceid']}, "
+                       f"{state['source_rows']} attendues")
+    if rows_hash != state['source_hash']:
+        return False, f"les lignes source jusqu'à la course {state['max_raceid']} ont été modifiées"
+    cleaned_rows, cleaned_rows_hash = summarize_cleaned(output_path, chunksize)
+    if cleaned_rows != state['cleaned_rows']:
+        return False, f"la sortie contient {cleaned_rows} lignes, {state['cleaned_rows']} attendues"
+    # L'instantané est lu de préférence au CSV (store.read_table, tenseur des tours, statistiques) dès qu'il n'est
+    # pas plus ancien : il doit contenir les mêmes lignes
+    path = snapshot_path(output_path)
+    if (not str(output_path).endswith('.parquet') and path.exists() and snapshot_supported()
+            and os.path.getmtime(path) >= os.path.getmtime(output_path)):
+        if summarize_cleaned(str(path), chunksize) != (cleaned_rows, cleaned_rows_hash):
+            return False, f"l'instantané {path} ne correspond pas à la sortie CSV"
+    return True, "sortie conforme à la source"
+
+def clean_lap_times_incremental(file_path, output_path, rejected_path=None, chunksize=DEFAULT_CHUNKSIZE,
+                                snapshot=True, full=False):
+    # N'analyse que les courses postérieures au filigrane ; reconstruction complète si demandé ou si la vérification échoue
+    state = None if full else read_watermark(output_path)
+    if state is not None:
+        ok, message = verify_cleaned_output(file_path, output_path, chunksize)
+        if not ok:
+            print(f"Reconstruction complète : {message}.")
+            state = None
+    if state is None:
+        stats = clean_lap_times_streaming(file_path, output_path, rejected_path, chunksize, snapshot)
+        state = {'max_raceid': stats['max_raceid'], 'source_rows': 0, 'cleaned_rows': 0, 'source_hash': 0}
+    else:
+        # État de l'instantané relevé avant l'ajout, qui rend le CSV plus récent que lui
+        rebuild = (snapshot and not str(output_path).endswith('.parquet') and snapshot_supported()
+                   and not snapshot_appendable(output_path, state))
+        stats = clean_lap_times_streaming(file_path, output_path, rejected_path, chunksize, snapshot and not rebuild,
+                                          min_raceid=state['max_raceid'], append=True)
+        if rebuild:
+            rebuild_snapshot(output_path, chunksize)
+    state = {
+        'max_raceid': stats['max_raceid'],
+        'source_rows': state['source_rows'] + stats['rows_read'],
+        'cleaned_rows': state['cleaned_rows'] + stats['rows_written'],
+        # Les nouvelles lignes ont toutes un raceId supérieur à l'ancien filigrane : les empreintes s'additionnent
+        'source_hash': (state['source_hash'] + stats['source_hash']) % HASH_MODULUS,
+    }
+    write_watermark(output_path, state)
+    return stats
+
+def snapshot_tables(table_paths=SNAPSHOT_TABLES):
+    # Instantané typé de chaque table présente, pour que les applications évitent de relire le CSV
+    written = []
+    for path in table_paths:
+        if os.path.exists(path):
+            written.append(snapshot_csv(path))
+    return [path for path in written if path is not None]
+
+def clean_table(df):
+    # Nettoyage commun aux tables Ergast : noms de colonnes en minuscules, lignes vides et doublons supprimés
+    df.columns = [col.lower() for col in df.columns]
+    return df.dropna(how='all').drop_duplicates()
+
+def clean_circuits(df):
+    return clean_coordinates(clean_table(df), 'lat', 'lng')
+
+def clean_weather(df):
+    return clean_coordinates(df.dropna(how='all'), 'fact_latitude', 'fact_longitude')
+
+def build_temps_par_courses(results_df, races_df, drivers_df, constructors_df, years=TEMPS_PAR_COURSES_YEARS):
+    # Résultats des saisons récentes avec les noms des pilotes et des constructeurs
+    race_ids = races_df.loc[races_df['year'].isin(years), 'raceid']
+    df = results_df[results_df['raceid'].isin(race_ids)]
+    df = df.merge(drivers_df[['driverid', 'forename', 'surname']], on='driverid', how='left')
+    df = df.merge(constructors_df[['constructorid', 'name']], on='constructorid', how='left')
+    return df.rename(columns={
+        'raceid': 'race_id',
+        'forename': 'driver_forename',
+        'surname': 'driver_surname',
+        'name': 'name_constructor'
+    })
+
+# Étapes du pipeline : fichier source (ou tables nettoyées dont l'étape dépend), sortie et fonction de nettoyage
+PIPELINE_STEPS = {
+    'lap_times': {'source': 'lap_times.csv', 'output': 'cleaned_lap_times.csv', 'depends': []},
+    'races': {'source': 'races.csv', 'output': 'cleaned_races.csv', 'clean': clean_table, 'depends': []},
+    'results': {'source': 'results.csv', 'output': 'cleaned_results.csv', 'clean': clean_table, 'depends': []},
+    'seasons': {'source': 'seasons.csv', 'output': 'cleaned_seasons.csv', 'clean': clean_table, 'depends': []},
+    'constructors': {'source': 'constructors.csv', 'output': 'cleaned_constructors.csv', 'clean': clean_table,
+                     'depends': []},
+    'drivers': {'source': 'drivers.csv', 'output': 'cleaned_drivers.csv', 'clean': clean_table, 'depends': []},
+    'qualifying': {'source': 'qualifying.csv', 'output': 'cleaned_qualifying.csv', 'clean': clean_table,
+                   'depends': []},
+    'circuits': {'source': 'circuits.csv', 'output': 'cleaned_circuits.csv', 'clean': clean_circuits, 'depends': []},
+    'weather': {'source': 'weather_meteo.csv', 'output': 'cleaned_weather_meteo.csv', 'clean': clean_weather,
+                'depends': []},
+    'temps_par_courses': {'output': 'temps_par_courses.csv', 'clean': build_temps_par_courses,
+                          'depends': ['results', 'races', 'drivers', 'constructors']},
+    'race_weather': {'output': 'race_weather.csv', 'clean': race_weather_features,
+                     'depends': ['weather', 'circuits', 'races']},
+}
+
+def run_step(name, data_dir='.', snapshot=True):
+    # Exécuté dans un processus du pool : lit ses entrées sur disque et écrit sa sortie (plus l'instantané)
+    start = time.perf_counter()
+    step = PIPELINE_STEPS[name]
+    output_path = os.path.join(data_dir, step['output'])
+    if name == 'lap_times':
+        stats = clean_lap_times_streaming(os.path.join(data_dir, step['source']), output_path,
+                                          os.path.join(data_dir, 'rejected_lap_times.csv'), snapshot=snapshot)
+        # Tenseur projeté en mémoire lu par la relecture des courses
+        write_lap_tensor(output_path)
+        return name, stats['rows_written'], time.perf_counter() - start
+    if step['depends']:
+        inputs = [pd.read_csv(os.path.join(data_dir, PIPELINE_STEPS[dep]['output'])) for dep in step['depends']]
+    else:
+        inputs = [pd.read_csv(os.path.join(data_dir, step['source']))]
+    df = step['clean'](*inputs)
+    df.to_csv(output_path, index=False)
+    if snapshot:
+        write_snapshot(df, output_path)
+    return name, len(df), time.perf_counter() - start
+
+def _step_available(name, data_dir):
+    step = PIPELINE_STEPS[name]
+    if 'source' in step:
+        return os.path.exists(os.path.join(data_dir, step['source']))
+    return True
+
+def run_pipeline(data_dir='.', steps=None, max_workers=None, snapshot=True):
+    # Les étapes indépendantes tournent en parallèle ; une étape n'est lancée qu'une fois ses dépendances terminées
+    steps = list(PIPELINE_STEPS) if steps is None else list(steps)
+    pending = set()
+    skipped = []
+    for name in steps:
+        if _step_available(name, data_dir):
+            pending.add(name)
+        else:
+            skipped.append(name)
+    # Une étape dont une dépendance est absente est ignorée elle aussi
+    changed = True
+    while changed:
+        changed = False
+        for name in sorted(pending):
+            if any(dep in skipped for dep in PIPELINE_STEPS[name]['depends']):
+                pending.discard(name)
+                skipped.append(name)
+                changed = True
+    for name in skipped:
+        print(f"[pipeline] {name} ignorée : fichier source introuvable.")
+
+    timings = {}
+    done = set()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            for name in sorted(pending):
+                # Dépendance hors sélection : on suppose sa sortie déjà présente sur disque
+                if all(dep in done or dep not in steps for dep in PIPELINE_STEPS[name]['depends']):
+                    running[executor.submit(run_step, name, data_dir, snapshot)] = name
+                    pending.discard(name)
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, rows, seconds = future.result()
+                del running[future]
+                done.add(name)
+                timings[name] = seconds
+                print(f"[pipeline] {name} : {rows} lignes en {seconds:.2f} s")
+    print(f"[pipeline] Terminé en {time.perf_counter() - start:.2f} s")
+    return timings
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nettoyage des temps au tour (lap_times.csv).")
+    parser.add_argument('--input', default='lap_times.csv')
+    parser.add_argument('--output', default='cleaned_lap_times.csv', help="Sortie CSV ou .parquet")
+    parser.add_argument('--all', action='store_true', help="Nettoyer toutes les tables Ergast en parallèle")
+    parser.add_argument('--data-dir', default='.', help="Dossier des fichiers Ergast (mode --all)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (mode --all)")
+    parser.add_argument('--stream', action='store_true', help="Lecture par blocs à mémoire bornée")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--incremental', action='store_true',
+                        help="N'ajouter que les courses postérieures au dernier raceId traité")
+    parser.add_argument('--full', action='store_true', help="Forcer la reconstruction complète en mode incrémental")
+    parser.add_argument('--verify', action='store_true', help="Vérifier la sortie nettoyée par rapport à la source")
+    parser.add_argument('--no-snapshot', action='store_true', help="Ne pas écrire les instantanés Parquet")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.verify:
+        ok, message = verify_cleaned_output(args.input, args.output, args.chunksize)
+        print(f"Vérification de {args.output} : {message}.")
+        sys.exit(0 if ok else 1)
+    if args.all:
+        run_pipeline(args.data_dir, max_workers=args.workers, snapshot=not args.no_snapshot)
+        sys.exit(0)
+    if args.stream or args.incremental:
+        if args.incremental:
+            stats = clean_lap_times_incremental(args.input, args.output, 'rejected_lap_times.csv', args.chunksize,
+                                                snapshot=not args.no_snapshot, full=args.full)
+            print(f"Courses traitées jusqu'au raceId {stats['max_raceid']}.")
+        else:
+            stats = clean_lap_times_streaming(args.input, args.output, 'rejected_lap_times.csv', args.chunksize,
+                                              snapshot=not args.no_snapshot)
+        if stats['rows_rejected']:
+            print(f"{stats['rows_rejected']} lignes rejetées (voir rejected_lap_times.csv).")
+        peak = f"{stats['peak_rss_mb']:.1f} Mo" if stats['peak_rss_mb'] is not None else "indisponible"
+        print(f"{stats['rows_read']} lignes lues en {stats['seconds']:.2f} s "
+              f"({stats['rows_per_second']:,.0f} lignes/s), pic mémoire : {peak}")
+    else:
+        # Nettoyer le fichier et sauvegarder le résultat
+        lap_times_df, rejected_df = clean_lap_times(args.input)
+        sink = open_sink(args.output)
+        try:
+            sink.write(lap_times_df)
+        finally:
+            # Le pied de page Parquet n'est écrit qu'à la fermeture
+            sink.close()
+        if not args.no_snapshot and not args.output.endswith('.parquet'):
+            write_snapshot(lap_times_df, args.output)
+        if not rejected_df.empty:
+            rejected_df.to_csv('rejected_lap_times.csv', index=False)
+            print(f"{len(rejected_df)} lignes rejetées (voir rejected_lap_times.csv).")
+    print(f'Nettoyage terminé pour {args.input}.')
+    if not args.no_snapshot:
+        if not snapshot_supported():
+            print("pyarrow non installé : instantanés Parquet non écrits.")
+        for path in snapshot_tables():
+            print(f"Instantané écrit : {path}")
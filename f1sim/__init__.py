@@ -0,0 +1 @@
+"""Bibliothèque commune des applications de simulation F1 (chargement, stockage, simulation)."""
@@ -0,0 +1,5 @@
+import sys
+
+from f1sim.cli import main
+
+sys.exit(main())
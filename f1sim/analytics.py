@@ -0,0 +1,297 @@
+"""Statistiques sur tout l'historique (carrières, saisons, circuits), calculées par blocs.
+
+Les résultats et les temps au tour sont lus par plages d'octets alignées sur les fins de ligne (CSV) ou par groupes de
+lignes (instantané Parquet). Chaque plage donne des agrégats partiels (sommes, comptes, minimums, et pour les temps au
+tour nombre, moyenne et somme des carrés des écarts à la moyenne) qui se fusionnent dans n'importe quel ordre : la mémoire dépend de la taille d'une plage et du nombre de clés (pilotes x saisons,
+pilotes x circuits), pas de la taille des fichiers, et les plages peuvent être traitées par plusieurs processus.
+
+    python -m f1sim.analytics --data-dir donnees --workers 4 --output-dir statistiques
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from f1sim.cube import CUBE_MEASURES, aggregate_results
+from f1sim.paths import data_path
+from f1sim.spans import traced
+from f1sim.store import NA_VALUES, read_table, snapshot_path, snapshot_supported
+from f1sim.times import parse_time_column
+
+# Taille d'une plage de CSV lue par une tâche
+RANGE_BYTES = 8 * 1024 ** 2
+
+RESULTS_COLUMNS = ['raceid', 'driverid', 'constructorid', 'position', 'positionorder', 'points']
+LAP_TIMES_COLUMNS = ['raceid', 'driverid', 'milliseconds']
+# Colonne lue à la place d'une colonne absente : dans les temps au tour nettoyés, time est déjà en millisecondes
+COLUMN_FALLBACKS = {'milliseconds': 'time'}
+
+# Agrégats partiels : clés et règle de fusion de chaque mesure (None : fusion propre à la table, voir PARTIAL_MERGERS)
+PARTIAL_TABLES = {
+    'driver_seasons': (['year', 'driverid'], dict.fromkeys(CUBE_MEASURES, 'sum')),
+    'constructor_seasons': (['year', 'constructorid'], dict.fromkeys(CUBE_MEASURES, 'sum')),
+    'driver_circuits': (['circuitid', 'driverid'], dict.fromkeys(CUBE_MEASURES, 'sum')),
+    # Nombre de tours, moyenne et somme des carrés des écarts à la moyenne (m2) : l'écart type se déduit sans
+    # soustraire deux grandes sommes voisines, ce qui perdrait la précision sur des temps de l'ordre de 90 000 ms
+    'lap_times': (['circuitid', 'driverid'], None),
+}
+
+# Tables de l'historique : la version nettoyée si elle existe, sinon le fichier Ergast
+HISTORY_TABLES = ['results', 'races', 'lap_times', 'drivers', 'constructors', 'circuits']
+
+class PartialStats:
+    # Agrégats partiels d'une ou plusieurs plages ; merge() est associatif et commutatif
+    def __init__(self, tables=None):
+        self.tables = dict(tables or {})
+
+    def merge(self, other):
+        tables = dict(self.tables)
+        for name, table in other.tables.items():
+            current = tables.get(name)
+            if current is None:
+                tables[name] = table
+            elif name in PARTIAL_MERGERS:
+                tables[name] = PARTIAL_MERGERS[name](current, table)
+            else:
+                keys, rules = PARTIAL_TABLES[name]
+                tables[name] = pd.concat([current, table]).groupby(level=keys).agg(rules)
+        return PartialStats(tables)
+
+def merge_lap_moments(left, right):
+    # Fusion de deux agrégats (laps, mean_lap_ms, lap_ms_m2, best_lap_ms) par la formule parallèle de Chan et al.
+    left, right = left.align(right, join='outer')
+    n_left = left['laps'].fillna(0)
+    n_right = right['laps'].fillna(0)
+    laps = n_left + n_right
+    mean_left = left['mean_lap_ms'].fillna(0)
+    delta = right['mean_lap_ms'].fillna(0) - mean_left
+    return pd.DataFrame({
+        'laps': laps.astype(np.int64),
+        'mean_lap_ms': mean_left + delta * n_right / laps,
+        'lap_ms_m2': (left['lap_ms_m2'].fillna(0) + right['lap_ms_m2'].fillna(0)
+                      + delta ** 2 * n_left * n_right / laps),
+        'best_lap_ms': np.fmin(left['best_lap_ms'], right['best_lap_ms']),
+    })
+
+PARTIAL_MERGERS = {'lap_times': merge_lap_moments}
+
+def race_lookup(races_df):
+    # Saison et circuit de chaque course, indexés par raceid
+    races = races_df.rename(columns=str.lower)
+    return races.drop_duplicates('raceid').set_index('raceid')[['year', 'circuitid']]
+
+def results_partial(chunk, races):
+    # Résultats -> cube de base (mêmes définitions que f1sim.cube) -> cumuls par saison et par circuit
+    facts = aggregate_results(chunk, races.reset_index())
+    facts['circuitid'] = races['circuitid'].reindex(facts['raceid']).to_numpy()
+    tables = {}
+    for name in ('driver_seasons', 'constructor_seasons', 'driver_circuits'):
+        keys, rules = PARTIAL_TABLES[name]
+        tables[name] = facts.groupby(keys)[list(rules)].sum()
+    return PartialStats(tables)
+
+def lap_milliseconds(chunk):
+    if 'milliseconds' in chunk.columns:
+        return pd.to_numeric(chunk['milliseconds'], errors='coerce')
+    if pd.api.types.is_numeric_dtype(chunk['time']):
+        return chunk['time']
+    return parse_time_column(chunk['time'])
+
+def lap_times_partial(chunk, races):
+    circuit = races['circuitid'].reindex(chunk['raceid']).to_numpy()
+    milliseconds = lap_milliseconds(chunk).to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = ~np.isnan(milliseconds) & ~pd.isna(circuit)
+    laps = pd.DataFrame({
+        'circuitid': circuit[keep].astype(np.int64),
+        'driverid': chunk['driverid'].to_numpy()[keep].astype(np.int64),
+        'ms': milliseconds[keep],
+    })
+    keys, _ = PARTIAL_TABLES['lap_times']
+    groups = laps.groupby(keys)['ms']
+    moments = groups.agg(laps='size', mean_lap_ms='mean', best_lap_ms='min')
+    # Somme des carrés des écarts à la moyenne de la plage
+    moments['lap_ms_m2'] = groups.var(ddof=0) * moments['laps']
+    return PartialStats({'lap_times': moments[['laps', 'mean_lap_ms', 'lap_ms_m2', 'best_lap_ms']]})
+
+PARTIAL_BUILDERS = {'results': (RESULTS_COLUMNS, results_partial), 'lap_times': (LAP_TIMES_COLUMNS, lap_times_partial)}
+
+def _exists(path):
+    return os.path.exists(path) or os.path.exists(snapshot_path(path))
+
+def history_paths(directory=None):
+    # Chemin de chaque table de HISTORY_TABLES : version nettoyée si présente, sinon le fichier Ergast d'origine
+    paths = []
+    for name in HISTORY_TABLES:
+        candidates = [data_path(f'cleaned_{name}.csv', directory), data_path(f'{name}.csv', directory)]
+        paths.append(next((path for path in candidates if _exists(path)), candidates[0]))
+    return paths
+
+def _parquet_source(path):
+    # Même règle que store.read_table : l'instantané est lu s'il existe et n'est pas plus ancien que le CSV
+    parquet = snapshot_path(path)
+    if not parquet.exists() or not snapshot_supported():
+        return None
+    if os.path.exists(path) and os.path.getmtime(parquet) < os.path.getmtime(path):
+        return None
+    return str(parquet)
+
+def byte_ranges(path, range_bytes=RANGE_BYTES):
+    # En-tête du CSV et plages (début, fin) d'environ range_bytes octets, chacune terminée par une fin de ligne
+    # (les champs entre guillemets ne contiennent pas de saut de ligne dans les fichiers Ergast)
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            f.readline()
+            stop = min(f.tell(), size)
+            ranges.append((start, stop))
+            start = stop
+    return header, ranges
+
+def plan_parts(path, range_bytes=RANGE_BYTES):
+    # Parties lues par les tâches : ('parquet', fichier, groupe de lignes) ou ('csv', fichier, (début, fin), en-tête)
+    parquet = _parquet_source(path)
+    if parquet is not None:
+        import pyarrow.parquet as pq
+        return [('parquet', parquet, group, None) for group in range(pq.ParquetFile(parquet).num_row_groups)]
+    header, ranges = byte_ranges(path, range_bytes)
+    return [('csv', path, part, header) for part in ranges]
+
+def _select_columns(names, columns):
+    # Noms du fichier des colonnes demandées (en minuscules), ou de leur colonne de remplacement
+    available = {name.lower(): name for name in names}
+    selected = [available.get(column) or available.get(COLUMN_FALLBACKS.get(column)) for column in columns]
+    return [name for name in selected if name is not None]
+
+def read_part(part, columns):
+    # Colonnes demandées présentes dans la partie, noms en minuscules
+    kind, path, position, header = part
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        df = parquet.read_row_group(position, columns=_select_columns(parquet.schema_arrow.names, columns)).to_pandas()
+    else:
+        start, stop = position
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(stop - start)
+        df = pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=_select_columns(header, columns),
+                         na_values=NA_VALUES)
+    df.columns = [column.lower() for column in df.columns]
+    return df
+
+def part_partial(table, part, races):
+    columns, build = PARTIAL_BUILDERS[table]
+    return build(read_part(part, columns), races)
+
+_worker_races = {}
+
+def _init_worker(races):
+    # Table des courses transmise une fois à chaque processus, pas à chaque tâche
+    _worker_races['races'] = races
+
+def _pooled_partial(table, part):
+    return part_partial(table, part, _worker_races['races'])
+
+def _summary(tables):
+    careers = tables['driver_seasons'].groupby(level='driverid').sum()
+    seasons = tables['driver_seasons'].reset_index().groupby('driverid')['year']
+    careers['seasons'] = seasons.nunique()
+    careers['first_season'] = seasons.min()
+    careers['last_season'] = seasons.max()
+    careers['points_per_start'] = careers['points'] / careers['entries']
+    circuits = tables['driver_circuits']
+    laps = tables.get('lap_times')
+    if laps is not None:
+        laps = laps.copy()
+        # Écart type d'échantillon (ddof=1), comme groupby().std() ; NaN pour un seul tour
+        laps['std_lap_ms'] = np.sqrt(laps['lap_ms_m2'] / (laps['laps'] - 1).where(laps['laps'] > 1))
+        circuits = circuits.join(laps[['laps', 'mean_lap_ms', 'std_lap_ms', 'best_lap_ms']], how='outer')
+    return {
+        'careers': careers.reset_index(),
+        'driver_seasons': tables['driver_seasons'].reset_index(),
+        'constructor_seasons': tables['constructor_seasons'].reset_index(),
+        'circuits': circuits.reset_index(),
+    }
+
+def _with_names(stats, drivers_df, constructors_df, circuits_df):
+    # Noms ajoutés en fin de calcul, sur les tables agrégées
+    if drivers_df is not None:
+        drivers = drivers_df.rename(columns=str.lower).drop_duplicates('driverid').set_index('driverid')
+        for name in ('careers', 'driver_seasons', 'circuits'):
+            for column in ('forename', 'surname'):
+                stats[name][column] = stats[name]['driverid'].map(drivers[column])
+    if constructors_df is not None:
+        constructors = constructors_df.rename(columns=str.lower).drop_duplicates('constructorid')
+        stats['constructor_seasons']['name'] = stats['constructor_seasons']['constructorid'].map(
+            constructors.set_index('constructorid')['name'])
+    if circuits_df is not None:
+        circuits = circuits_df.rename(columns=str.lower).drop_duplicates('circuitid').set_index('circuitid')
+        stats['circuits']['circuit'] = stats['circuits']['circuitid'].map(circuits['name'])
+    return stats
+
+@traced()
+def history_stats(results_path, races_path, lap_times_path=None, drivers_path=None, constructors_path=None,
+                  circuits_path=None, max_workers=None, range_bytes=RANGE_BYTES):
+    # Tables 'careers', 'driver_seasons', 'constructor_seasons' et 'circuits' sur tout l'historique ;
+    # les chemins facultatifs absents sont ignorés. max_workers=1 : tout dans le processus courant
+    races = race_lookup(read_table(races_path, na_values=NA_VALUES))
+    tasks = [('results', part) for part in plan_parts(results_path, range_bytes)]
+    if lap_times_path is not None and _exists(lap_times_path):
+        tasks += [('lap_times', part) for part in plan_parts(lap_times_path, range_bytes)]
+    partial = PartialStats()
+    if max_workers == 1 or len(tasks) <= 1:
+        for table, part in tasks:
+            partial = partial.merge(part_partial(table, part, races))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(races,)) as executor:
+            futures = [executor.submit(_pooled_partial, table, part) for table, part in tasks]
+            # Fusion au fil de l'eau : seuls les agrégats (petits) restent en mémoire
+            for future in as_completed(futures):
+                partial = partial.merge(future.result())
+    optional = [read_table(path, na_values=NA_VALUES) if path is not None and _exists(path) else None
+                for path in (drivers_path, constructors_path, circuits_path)]
+    return _with_names(_summary(partial.tables), *optional)
+
+def history_stats_in(directory=None, max_workers=None, range_bytes=RANGE_BYTES):
+    return history_stats(*history_paths(directory), max_workers=max_workers, range_bytes=range_bytes)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Statistiques sur tout l'historique, calculées par blocs.")
+    parser.add_argument('--data-dir', default=None,
+                        help="Dossier des tables (par défaut : $F1SIM_DATA_DIR, sinon le dossier courant)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (1 : sans parallélisme)")
+    parser.add_argument('--range-mb', type=float, default=RANGE_BYTES / 1024 ** 2,
+                        help="Taille des plages de CSV lues par chaque tâche (Mo)")
+    parser.add_argument('--output-dir', default='.', help="Dossier où écrire les tables (CSV)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from f1sim.cli import write_results
+
+    args = parse_args(argv)
+    start = time.perf_counter()
+    try:
+        stats = history_stats_in(args.data_dir, args.workers, int(args.range_mb * 1024 ** 2))
+    except FileNotFoundError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, df in stats.items():
+        path = os.path.join(args.output_dir, f'{name}_stats.csv')
+        write_results(df, path)
+        print(f"{path} : {len(df)} lignes", file=sys.stderr)
+    print(f"Statistiques calculées en {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Calendrier 2024 : identifiant de course de chaque circuit et prévisions météo saisies à la main."""
+
+CIRCUIT_RACE_IDS = {
+    "Bahreïn (Sakhir)": 1121,
+    "Australie (Melbourne)": 1123,
+    "Chine (Shanghai)": 1125,
+    "Japon (Suzuka)": 1124,
+    "Arabie saoudite (Djeddah)": 1122,
+    "Miami (Floride)": 1126,
+    "Emilie Romagne (Imola)": 1127,
+    "Monaco (Monte-Carlo)": 1128,
+    "Espagne (Barcelone)": 1130,
+    "Canada (Montréal)": 1129,
+    "Autriche (Spielberg)": 1131,
+    "Royaume-Uni (Silverstone)": 1132,
+    "Hongrie (Budapest)": 1133,
+    "Grand Prix de Belgique (Spa-Francorchamps)": 1134,
+    "Pays-Bas (Zandvoort)": 1135,
+    "Italie (Monza)": 1136,
+    "Azerbaïdjan (Bakou)": 1137,
+    "Singapour (Marina Bay)": 1138,
+    "USA (Austin)": 1139,
+    "Mexique (Mexico City)": 1140,
+    "Brésil (São Paulo)": 1141,
+    "Las Vegas (Nevada)": 1142,
+    "Qatar (Doha)": 1143,
+    "Abu Dhabi (Yas Marina)": 1144
+}
+
+# Prévisions de repli : utilisées seulement pour une course sans relevé dans race_weather.csv (voir
+# f1sim.simulation.circuit_weather)
+WEATHER_FORECASTS = {
+    "Australie (Melbourne)": {"condition": "Averses", "temp_min": 11, "temp_max": 12},
+    "Chine (Shanghai)": {"condition": "Orage", "temp_min": 27, "temp_max": 28},
+    "Japon (Suzuka)": {"condition": "Nuageux", "temp_min": 28, "temp_max": 31},
+    "Bahreïn (Sakhir)": {"condition": "Ciel clair", "temp_min": 30, "temp_max": 38},
+    "Arabie saoudite (Djeddah)": {"condition": "Ciel peu nuageux", "temp_min": 30, "temp_max": 36},
+    "Miami (Floride)": {"condition": "Ciel changeant", "temp_min": 24, "temp_max": 31},
+    "Emilie Romagne (Imola)": {"condition": "Très nuageux avec averses", "temp_min": 15, "temp_max": 21},
+    "Monaco (Monte-Carlo)": {"condition": "Beau temps peu nuageux", "temp_min": 20, "temp_max": 24},
+    "Espagne (Barcelone)": {"condition": "Très nuageux avec orage", "temp_min": 20, "temp_max": 21},
+    "Canada (Montréal)": {"condition": "Ciel dégagé", "temp_min": 15, "temp_max": 25},
+    "Autriche (Spielberg)": {"condition": "Ciel peu nuageux", "temp_min": 15, "temp_max": 20},
+    "Royaume-Uni (Silverstone)": {"condition": "Temps instable", "temp_min": 15, "temp_max": 20},
+    "Hongrie (Budapest)": {"condition": "Ciel clair", "temp_min": 16, "temp_max": 23},
+    "Grand Prix de Belgique (Spa-Francorchamps)": {"condition": "Ciel clair devenant peu nuageux", "temp_min": 14, "temp_max": 21},
+    "Pays-Bas (Zandvoort)": {"condition": "Légers passages nuageux", "temp_min": 16, "temp_max": 22},
+    "Italie (Monza)": {"condition": "Ciel variable", "temp_min": 17, "temp_max": 24},
+    "Azerbaïdjan (Bakou)": {"condition": "Éclaircies", "temp_min": 19, "temp_max": 23},
+    "Singapour (Marina Bay)": {"condition": "Nuages et éclaircies", "temp_min": 27, "temp_max": 30},
+    "USA (Austin)": {"condition": "Visibilités réduites le matin", "temp_min": 24, "temp_max": 36},
+    "Mexique (Mexico City)": {"condition": "Instable avec averses", "temp_min": 18, "temp_max": 26},
+    "Brésil (São Paulo)": {"condition": "Beau temps", "temp_min": 16, "temp_max": 32},
+    "Las Vegas (Nevada)": {"condition": "Temps incertain", "temp_min": 17, "temp_max": 30},
+    "Qatar (Doha)": {"condition": "Ciel clair", "temp_min": 29, "temp_max": 37},
+    "Abu Dhabi (Yas Marina)": {"condition": "Ciel peu nuageux devenant clair", "temp_min": 30, "temp_max": 37}
+}
+
+# Prévision par défaut d'un circuit sans prévision ni relevé
+DEFAULT_WEATHER = {"condition": "Ciel clair", "temp_min": 20, "temp_max": 25}
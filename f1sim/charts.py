@@ -0,0 +1,73 @@
+"""Graphiques de positions construits en une passe à partir de tableaux NumPy.
+
+Tous les tracés sont créés ensemble (pas d'iterrows ni d'add_trace pilote par pilote). Au-delà d'un certain
+nombre de points, les séries sont réduites (minimum et maximum par intervalle, pour garder les dépassements visibles)
+et le rendu passe en WebGL (Scattergl), ce qui garde la figure envoyée au navigateur petite.
+"""
+import numpy as np
+
+from f1sim.spans import traced
+
+# Nombre total de points au-delà duquel le rendu passe en WebGL
+WEBGL_POINT_THRESHOLD = 2_000
+# Nombre maximal de points conservés par série
+MAX_POINTS_PER_SERIES = 400
+
+def decimate(x, y, max_points=MAX_POINTS_PER_SERIES):
+    # x : (points,), y : (points, séries) ; retourne les indices retenus pour chaque série, forme (retenus, séries)
+    n_points, n_series = y.shape
+    if n_points <= max_points:
+        return np.broadcast_to(np.arange(n_points)[:, None], y.shape)
+    bucket = int(np.ceil(n_points / (max_points // 2)))
+    n_buckets = int(np.ceil(n_points / bucket))
+    padded = np.full((n_buckets * bucket, n_series), np.nan)
+    padded[:n_points] = y
+    blocks = padded.reshape(n_buckets, bucket, n_series)
+    offsets = np.arange(n_buckets)[:, None] * bucket
+    low = np.argmin(np.where(np.isnan(blocks), np.inf, blocks), axis=1) + offsets
+    high = np.argmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1) + offsets
+    indices = np.sort(np.concatenate([low, high, np.zeros((1, n_series), dtype=np.int64),
+                                      np.full((1, n_series), n_points - 1)]), axis=0)
+    return np.minimum(indices, n_points - 1)
+
+def _compact(values):
+    # Positions entières sur un octet lorsque c'est possible : charge utile JSON plus petite
+    if np.isfinite(values).all() and np.array_equal(values, np.round(values)) and np.abs(values).max(initial=0) < 128:
+        return values.astype(np.int8)
+    return values.astype(np.float32)
+
+@traced()
+def position_figure(x, positions, names, title, xaxis_title, mode='lines', max_points=MAX_POINTS_PER_SERIES,
+                    webgl_threshold=WEBGL_POINT_THRESHOLD):
+    # x : (points,) ; positions : (points, séries) ; names : un nom par série
+    import plotly.graph_objects as go
+
+    x = np.asarray(x)
+    positions = np.asarray(positions, dtype=float)
+    indices = decimate(x, positions, max_points)
+    kept_x = x[indices]
+    kept_y = np.take_along_axis(positions, indices, axis=0)
+    trace_type = go.Scattergl if kept_y.size > webgl_threshold else go.Scatter
+    traces = [trace_type(x=_compact(kept_x[:, i].astype(float)), y=_compact(kept_y[:, i]), mode=mode, name=str(name))
+              for i, name in enumerate(names)]
+
+    n_positions = positions.shape[1]
+    layout = dict(
+        title=title,
+        xaxis_title=xaxis_title,
+        yaxis_title="Position",
+        yaxis=dict(tickmode='array', tickvals=list(range(1, n_positions + 1)), autorange="reversed"),
+        showlegend=True
+    )
+    return go.Figure(data=traces, layout=layout)
+
+def progress_figure(start_positions, end_positions, names, n_steps=10):
+    # Progression linéaire de la position de départ à la position finale, pour toutes les séries d'un coup
+    progress = np.linspace(0, 100, n_steps)
+    start_positions = np.asarray(start_positions, dtype=float)
+    end_positions = np.asarray(end_positions, dtype=float)
+    positions = start_positions + (end_positions - start_positions) * (progress[:, None] / 100)
+    fig = position_figure(progress, positions, names, "Simulation dynamique de la course avec dépassements",
+                          "Progression de la course (%)", mode='lines+markers')
+    fig.update_layout(xaxis=dict(range=[0, 100]))
+    return fig
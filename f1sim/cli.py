@@ -0,0 +1,63 @@
+"""Simulations en ligne de commande, sans Streamlit.
+
+    python -m f1sim --data-dir donnees --circuits "Italie (Monza)" "Monaco (Monte-Carlo)" --runs 100000 --seed 1 \
+        --output resultats.parquet
+"""
+import argparse
+import os
+import sys
+import time
+
+from f1sim.calendar import CIRCUIT_RACE_IDS
+from f1sim.simulation import MODES, simulate_circuits
+
+OUTPUT_FORMATS = ('csv', 'parquet', 'json')
+
+def output_format(path, output_format=None):
+    # Format explicite, sinon déduit de l'extension (CSV par défaut, et pour la sortie standard)
+    if output_format:
+        return output_format
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return extension if extension in OUTPUT_FORMATS else 'csv'
+
+def write_results(df, path, fmt=None):
+    fmt = output_format(path, fmt)
+    if fmt == 'parquet':
+        if path == '-':
+            raise ValueError("La sortie Parquet doit être écrite dans un fichier.")
+        df.to_parquet(path, index=False)
+    elif fmt == 'json':
+        df.to_json(sys.stdout if path == '-' else path, orient='records', force_ascii=False, indent=2)
+    else:
+        df.to_csv(sys.stdout if path == '-' else path, index=False)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation de courses F1 sans interface.")
+    parser.add_argument('--data-dir', default=None,
+                        help="Dossier des tables (par défaut : $F1SIM_DATA_DIR, sinon le dossier courant)")
+    parser.add_argument('--circuits', nargs='*', default=None, help="Circuits à simuler (par défaut : tout le calendrier)")
+    parser.add_argument('--runs', type=int, default=10_000, help="Nombre de courses (ou de saisons) simulées")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--mode', choices=MODES, default='race')
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (mode season)")
+    parser.add_argument('--output', default='-', help="Fichier de sortie (.csv, .parquet, .json) ou - pour la sortie standard")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=None)
+    parser.add_argument('--list-circuits', action='store_true', help="Afficher les circuits disponibles")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.list_circuits:
+        for circuit, race_id in CIRCUIT_RACE_IDS.items():
+            print(f"{race_id}\t{circuit}")
+        return 0
+    start = time.perf_counter()
+    try:
+        results = simulate_circuits(args.circuits, args.runs, args.seed, args.mode, args.data_dir, args.workers)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    write_results(results, args.output, args.format)
+    # Le résumé va sur la sortie d'erreur pour ne pas se mêler aux résultats écrits sur la sortie standard
+    print(f"{args.runs:,} simulations ({args.mode}) en {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    return 0
@@ -0,0 +1,121 @@
+"""Agrégats pré-calculés des résultats : points, victoires, podiums et abandons.
+
+Le cube de base est au grain saison x course x pilote x constructeur ; deux cumuls par saison (pilote, constructeur)
+en sont tirés, en tableaux denses. Les totaux d'une période quelconque sont une somme sur l'axe des saisons de ces
+tableaux, sans repasser par les résultats. Les mesures étant additives, des résultats ajoutés sont agrégés seuls puis
+ajoutés aux cumuls.
+"""
+import numpy as np
+import pandas as pd
+
+CUBE_KEYS = ['year', 'raceid', 'driverid', 'constructorid']
+CUBE_MEASURES = ['points', 'wins', 'podiums', 'dnfs', 'entries']
+
+def aggregate_results(results_df, races_df):
+    # Résultats -> cube de base ; les résultats d'une course absente de races_df sont ignorés
+    race_years = races_df.drop_duplicates('raceid').set_index('raceid')['year']
+    year = results_df['raceid'].map(race_years)
+    keep = year.notna().to_numpy()
+    results = results_df[keep]
+    order = pd.to_numeric(results['positionorder'], errors='coerce')
+    facts = pd.DataFrame({
+        'year': year[keep].astype(np.int16).to_numpy(),
+        'raceid': results['raceid'].to_numpy(dtype=np.int32),
+        'driverid': results['driverid'].to_numpy(dtype=np.int32),
+        'constructorid': results['constructorid'].to_numpy(dtype=np.int32),
+        'points': pd.to_numeric(results['points'], errors='coerce').fillna(0).to_numpy(dtype=np.float64),
+        'wins': (order == 1).to_numpy(dtype=np.int32),
+        'podiums': (order <= 3).to_numpy(dtype=np.int32),
+        # Pas de position d'arrivée (\N) : pilote non classé
+        'dnfs': pd.to_numeric(results['position'], errors='coerce').isna().to_numpy(dtype=np.int32),
+        'entries': np.ones(len(results), dtype=np.int32),
+    })
+    return facts.groupby(CUBE_KEYS, as_index=False, sort=False).sum()
+
+def _grow(values, axis_values, new_axis_values, axis):
+    # Tableau réindexé sur un axe agrandi (nouvelles saisons ou nouveaux identifiants), complété par des zéros
+    if len(new_axis_values) == len(axis_values):
+        return values
+    shape = list(values.shape)
+    shape[axis] = len(new_axis_values)
+    grown = np.zeros(shape, dtype=values.dtype)
+    index = [slice(None)] * values.ndim
+    index[axis] = np.searchsorted(new_axis_values, axis_values)
+    grown[tuple(index)] = values
+    return grown
+
+class PointsCube:
+    # Cube de base (DataFrame au grain CUBE_KEYS) et cumuls par saison en tableaux denses
+    # (saison x pilote x mesure, saison x constructeur x mesure), dont les axes sont years, driver_ids et
+    # constructor_ids. Partagé entre les sessions : extend() retourne un nouveau cube sans modifier celui-ci.
+    def __init__(self, base, years=None, driver_ids=None, constructor_ids=None, season_drivers=None,
+                 season_constructors=None):
+        self.base = base.reset_index(drop=True)
+        if season_drivers is None:
+            years = np.unique(self.base['year'])
+            driver_ids = np.unique(self.base['driverid'])
+            constructor_ids = np.unique(self.base['constructorid'])
+            season_drivers = np.zeros((len(years), len(driver_ids), len(CUBE_MEASURES)))
+            season_constructors = np.zeros((len(years), len(constructor_ids), len(CUBE_MEASURES)))
+            _accumulate(season_drivers, self.base, years, 'driverid', driver_ids)
+            _accumulate(season_constructors, self.base, years, 'constructorid', constructor_ids)
+        self.years = years
+        self.driver_ids = driver_ids
+        self.constructor_ids = constructor_ids
+        self.season_drivers = season_drivers
+        self.season_constructors = season_constructors
+
+    @classmethod
+    def from_results(cls, results_df, races_df):
+        return cls(aggregate_results(results_df, races_df))
+
+    def extend(self, results_df, races_df):
+        # Ajout de nouveaux résultats : seules les nouvelles lignes sont agrégées, puis ajoutées aux cumuls
+        # (les mesures sont additives, rien n'est recalculé pour les lignes déjà présentes)
+        new = aggregate_results(results_df, races_df)
+        if new.empty:
+            return self
+        base = pd.concat([self.base, new], ignore_index=True)
+        # Une même clé peut revenir (résultat complété après coup) : elle est fusionnée
+        if base.duplicated(CUBE_KEYS).any():
+            base = base.groupby(CUBE_KEYS, as_index=False, sort=False).sum()
+        years = np.union1d(self.years, new['year'])
+        driver_ids = np.union1d(self.driver_ids, new['driverid'])
+        constructor_ids = np.union1d(self.constructor_ids, new['constructorid'])
+        season_drivers = _grow(_grow(self.season_drivers, self.years, years, 0), self.driver_ids, driver_ids, 1)
+        season_constructors = _grow(_grow(self.season_constructors, self.years, years, 0),
+                                    self.constructor_ids, constructor_ids, 1)
+        # Copies : les tableaux du cube d'origine restent inchangés
+        season_drivers = season_drivers.copy() if season_drivers is self.season_drivers else season_drivers
+        season_constructors = (season_constructors.copy() if season_constructors is self.season_constructors
+                               else season_constructors)
+        _accumulate(season_drivers, new, years, 'driverid', driver_ids)
+        _accumulate(season_constructors, new, years, 'constructorid', constructor_ids)
+        return PointsCube(base, years, driver_ids, constructor_ids, season_drivers, season_constructors)
+
+    def season_mask(self, years):
+        return np.isin(self.years, np.asarray(list(years)))
+
+    def driver_totals(self, years):
+        # Une ligne par pilote ayant pris part à au moins une course des saisons demandées
+        return _totals(self.season_drivers[self.season_mask(years)].sum(axis=0), 'driverid', self.driver_ids)
+
+    def constructor_totals(self, years):
+        return _totals(self.season_constructors[self.season_mask(years)].sum(axis=0), 'constructorid',
+                       self.constructor_ids)
+
+def _accumulate(values, facts, years, key, ids):
+    # Ajoute les mesures de facts aux cumuls values (saison x identifiant x mesure)
+    cells = np.searchsorted(years, facts['year'].to_numpy()) * len(ids) + np.searchsorted(ids, facts[key].to_numpy())
+    flat = values.reshape(-1, len(CUBE_MEASURES))
+    for position, measure in enumerate(CUBE_MEASURES):
+        flat[:, position] += np.bincount(cells, weights=facts[measure].to_numpy(dtype=np.float64),
+                                         minlength=len(flat))
+
+def _totals(values, key, ids):
+    present = values[:, CUBE_MEASURES.index('entries')] > 0
+    table = pd.DataFrame(values[present], columns=CUBE_MEASURES)
+    table.insert(0, key, ids[present])
+    counts = [measure for measure in CUBE_MEASURES if measure != 'points']
+    table[counts] = table[counts].astype(np.int64)
+    return table
@@ -0,0 +1,111 @@
+"""Table des pilotes : notes, positions moyennes de départ et d'arrivée, en tableaux NumPy contigus.
+
+Les moyennes sont calculées une fois à partir de temps_par_courses.csv (groupby sur 'grid' et 'positionorder')
+et la table est recalculée automatiquement lorsque le fichier change (cache de f1sim.loader).
+"""
+import numpy as np
+import pandas as pd
+
+from f1sim.loader import load_table
+
+# Pilotes de la grille actuelle, par driverid
+CURRENT_DRIVERS = [830, 815, 844, 832, 1, 847, 4, 840, 846, 857, 842, 839, 825, 807, 848, 858, 822, 855, 817, 852]
+
+# Notes générales des pilotes actuels (les autres pilotes reçoivent la note médiane)
+GENERAL_RATINGS = {
+    830: 91,   # Max Verstappen
+    815: 88,   # Sergio Pérez
+    844: 89,   # Charles Leclerc
+    832: 88,   # Carlos Sainz
+    1: 87,     # Lewis Hamilton
+    847: 86,   # George Russell
+    4: 85,     # Fernando Alonso
+    846: 90,   # Lando Norris
+    857: 82,   # Oscar Piastri
+    842: 84,   # Pierre Gasly
+    839: 83,   # Esteban Ocon
+    825: 78,   # Kevin Magnussen
+    807: 80,   # Nico Hülkenberg
+    848: 82,   # Alex Albon
+    858: 70,   # Logan Sargeant
+    822: 80,   # Valtteri Bottas
+    855: 75,   # Guanyu Zhou
+    817: 81,   # Daniel Ricciardo
+    852: 78,   # Yuki Tsunoda
+    840: 75,   # Lance Stroll
+}
+
+class DriverTable:
+    # Colonnes parallèles ; la recherche par driverid passe par un index trié (searchsorted), sans dictionnaire
+    def __init__(self, driver_ids, names, ratings, average_start, average_finish):
+        self.driver_ids = np.ascontiguousarray(driver_ids, dtype=np.int64)
+        self.names = np.asarray(names, dtype=object)
+        self.ratings = np.ascontiguousarray(ratings, dtype=float)
+        self.average_start = np.ascontiguousarray(average_start, dtype=float)
+        self.average_finish = np.ascontiguousarray(average_finish, dtype=float)
+        self._order = np.argsort(self.driver_ids, kind='stable')
+        self._sorted_ids = self.driver_ids[self._order]
+
+    @classmethod
+    def from_frame(cls, race_data):
+        # Compatibilité avec les DataFrames 'Nom du pilote', 'Rating', 'Average_start', 'Average_finish'
+        driver_ids = race_data['driverid'] if 'driverid' in race_data.columns else np.arange(len(race_data))
+        return cls(driver_ids, race_data['Nom du pilote'], race_data['Rating'], race_data['Average_start'],
+                   race_data['Average_finish'])
+
+    def __len__(self):
+        return len(self.driver_ids)
+
+    def positions(self, driver_ids):
+        # Indice de chaque driverid dans la table
+        driver_ids = np.asarray(driver_ids, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self._sorted_ids, driver_ids), len(self) - 1)
+        missing = self._sorted_ids[found] != driver_ids
+        if missing.any():
+            raise KeyError(f"Pilotes absents de la table : {driver_ids[missing].tolist()}")
+        return self._order[found]
+
+    def select(self, driver_ids):
+        # Sous-table dans l'ordre demandé
+        positions = self.positions(driver_ids)
+        return DriverTable(self.driver_ids[positions], self.names[positions], self.ratings[positions],
+                           self.average_start[positions], self.average_finish[positions])
+
+    def name_mapping(self):
+        return dict(zip(self.driver_ids.tolist(), self.names.tolist()))
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'driverid': self.driver_ids,
+            'Nom du pilote': self.names,
+            'Rating': self.ratings,
+            'Average_start': self.average_start,
+            'Average_finish': self.average_finish
+        })
+
+def as_driver_table(race_data):
+    return race_data if isinstance(race_data, DriverTable) else DriverTable.from_frame(race_data)
+
+def build_driver_table(temps_par_courses_df, ratings=GENERAL_RATINGS):
+    df = temps_par_courses_df
+    # Une grille à 0 correspond à un départ des stands : exclue de la moyenne de départ
+    grid = pd.to_numeric(df['grid'], errors='coerce')
+    history = pd.DataFrame({
+        'driverid': df['driverid'].to_numpy(),
+        'grid': grid.where(grid > 0).to_numpy(dtype=float),
+        'positionorder': pd.to_numeric(df['positionorder'], errors='coerce').to_numpy(dtype=float),
+        'name': (df['driver_forename'].astype(str) + ' ' + df['driver_surname'].astype(str)).to_numpy(),
+    }).groupby('driverid').agg(Average_start=('grid', 'mean'), Average_finish=('positionorder', 'mean'),
+                               name=('name', 'last'))
+    # Pilotes notés sans historique : moyennes du plateau
+    history = history.reindex(history.index.union(pd.Index(list(ratings), name='driverid')))
+    history['Average_start'] = history['Average_start'].fillna(history['Average_start'].mean())
+    history['Average_finish'] = history['Average_finish'].fillna(history['Average_finish'].mean())
+    history['name'] = history['name'].fillna(pd.Series(history.index.astype(str), index=history.index))
+    rating = history.index.map(ratings).to_numpy(dtype=float)
+    rating = np.where(np.isnan(rating), np.median(list(ratings.values())), rating)
+    return DriverTable(history.index.to_numpy(), history['name'].to_numpy(), rating,
+                       history['Average_start'].to_numpy(), history['Average_finish'].to_numpy())
+
+def load_driver_table(temps_par_courses_path):
+    return load_table(temps_par_courses_path, prepare=build_driver_table)
@@ -0,0 +1,225 @@
+"""Historique des championnats : résultats avec les noms des pilotes et des constructeurs, et vues par saisons.
+
+La table dénormalisée est construite une fois (noms en colonnes catégorielles, retrouvés par indexation plutôt que
+par fusion) ; chaque sélection de saisons est ensuite mémorisée par le tuple des années demandées. Le calendrier
+de remplacement (23 courses par saison) est construit pour toutes les saisons en une seule opération.
+
+Les totaux de points par constructeur et par pilote sont tirés du cube des points (voir f1sim.cube). Lorsque la
+table des résultats est seulement prolongée (nouvelles lignes en fin de fichier, lignes existantes inchangées d'après
+leur empreinte), les vues suivantes reprennent la table dénormalisée et le cube des précédentes et n'y ajoutent que
+les nouvelles lignes ; toute autre modification les reconstruit entièrement.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from f1sim.cube import CUBE_MEASURES, PointsCube
+
+PLACEHOLDER_RACES = 23
+
+def _lookup(keys, table, key_column, value_column):
+    # Valeur de value_column pour chaque clé, en catégorielle (NaN si la clé est absente de table)
+    table = table.drop_duplicates(key_column)
+    positions = pd.Index(table[key_column]).get_indexer(keys)
+    values = pd.Categorical(table[value_column])
+    codes = np.where(positions >= 0, values.codes[positions], -1)
+    return pd.Categorical.from_codes(codes, categories=values.categories)
+
+def results_with_names(results_df, drivers_df, constructors_df):
+    # Même résultat que deux fusions à gauche sur driverid et constructorid, colonnes renommées pour les graphiques
+    df = results_df.reset_index(drop=True)
+    df['driver_forename'] = _lookup(df['driverid'], drivers_df, 'driverid', 'forename')
+    df['driver_surname'] = _lookup(df['driverid'], drivers_df, 'driverid', 'surname')
+    df['name_constructor'] = _lookup(df['constructorid'], constructors_df, 'constructorid', 'name')
+    return df
+
+PLACEHOLDER_NAN_COLUMNS = ['fp1_date', 'fp1_time', 'fp2_date', 'fp2_time', 'fp3_date', 'fp3_time', 'quali_date',
+                           'quali_time', 'sprint_date', 'sprint_time']
+
+def placeholder_calendar(races_df, years, num_races=PLACEHOLDER_RACES):
+    # num_races courses fictives par saison, hebdomadaires à partir du premier dimanche de l'année
+    years = np.asarray(years, dtype=np.int64)
+    first_id = max(races_df['raceid'].max() + 1, 1)
+    rounds = np.tile(np.arange(1, num_races + 1), len(years))
+    year = np.repeat(years, num_races)
+    new_year = (year - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    # Le 1er janvier 1970 est un jeudi : jour de la semaine (lundi = 0) = (jours depuis 1970 + 3) % 7
+    weekday = (new_year.astype(np.int64) + 3) % 7
+    date = new_year + (6 - weekday) % 7 + (rounds - 1) * 7
+    round_text = rounds.astype(str).astype(object)
+    columns = {
+        # Les mêmes identifiants sont repris d'une saison à l'autre
+        'raceid': first_id + rounds - 1,
+        'year': year,
+        'round': rounds,
+        'circuitid': rounds,
+        'name': 'Race ' + round_text,
+        'date': date.astype('datetime64[s]'),
+        'time': np.full(len(rounds), '15:00:00', dtype=object),
+        'url': 'http://en.wikipedia.org/wiki/' + year.astype(str).astype(object) + '_Race_' + round_text,
+    }
+    columns.update({column: np.full(len(rounds), np.nan) for column in PLACEHOLDER_NAN_COLUMNS})
+    return pd.DataFrame(columns)
+
+def _row_hashes(df):
+    # Empreinte de chaque ligne (toutes les colonnes) : une valeur corrigée dans une ligne existante change son empreinte
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def _same_rows(old, old_hashes, new, new_hashes):
+    return len(old) == len(new) and _is_prefix(old, old_hashes, new, new_hashes)
+
+def _is_prefix(old, old_hashes, new, new_hashes):
+    # new commence par les lignes de old, inchangées (mêmes colonnes, mêmes valeurs, dans le même ordre)
+    if len(new) < len(old) or list(old.columns) != list(new.columns):
+        return False
+    return np.array_equal(old_hashes, new_hashes[:len(old)])
+
+class SeasonViews:
+    # Tables sources conservées telles quelles : les vues mémorisées sont partagées et ne doivent pas être modifiées
+    def __init__(self, races_df, results_df, seasons_df, constructors_df, drivers_df, previous=None):
+        self.sources = (races_df, results_df, seasons_df, constructors_df, drivers_df)
+        self.races = races_df.reset_index(drop=True)
+        # Empreintes par ligne des tables dont dépendent la table dénormalisée et le cube (seasons_df n'y entre pas)
+        self._hashes = (_row_hashes(races_df), _row_hashes(results_df), None, _row_hashes(constructors_df),
+                        _row_hashes(drivers_df))
+        appended = previous is not None and self._extends(previous)
+        # Les tables servies par le chargeur sont de nouveaux objets à chaque appel : les noms sont comparés par contenu
+        if appended and self._same_names(previous):
+            new_rows = results_with_names(results_df.iloc[len(previous.results):], drivers_df, constructors_df)
+            self.results = pd.concat([previous.results, new_rows], ignore_index=True)
+        else:
+            self.results = results_with_names(results_df, drivers_df, constructors_df)
+        self.season_years = set(seasons_df['year'].tolist())
+        # Saison de chaque résultat, pour filtrer sans repasser par les identifiants de course
+        race_years = pd.Series(self.races['year'].to_numpy(), index=self.races['raceid']).groupby(level=0).first()
+        self._result_years = self.results['raceid'].map(race_years).to_numpy()
+        self._cube = None
+        if appended and previous._cube is not None:
+            self._cube = previous._cube.extend(results_df.iloc[len(previous.results):], races_df)
+        self._views = {}
+        self._totals = {}
+        self._groups = None
+        self._lock = threading.Lock()
+
+    def _extends(self, previous):
+        # Les résultats (et les courses) de previous sont repris à l'identique en tête des nouvelles tables : seules
+        # des lignes ont été ajoutées à la fin. Toute autre modification (valeur corrigée, ligne supprimée ou
+        # réordonnée) impose de tout reconstruire
+        races_df, results_df = self.sources[:2]
+        return (_is_prefix(previous.sources[0], previous._hashes[0], races_df, self._hashes[0])
+                and _is_prefix(previous.sources[1], previous._hashes[1], results_df, self._hashes[1]))
+
+    def _same_names(self, previous):
+        # Pilotes et constructeurs inchangés : les noms déjà joints aux résultats restent valables
+        return all(_same_rows(previous.sources[position], previous._hashes[position], self.sources[position],
+                              self._hashes[position]) for position in (3, 4))
+
+    @property
+    def cube(self):
+        # Construit au premier besoin
+        with self._lock:
+            if self._cube is None:
+                self._cube = PointsCube.from_results(self.sources[1], self.races)
+            return self._cube
+
+    def has_seasons(self, years):
+        return any(year in self.season_years for year in years)
+
+    def select(self, years):
+        # (courses, résultats) des saisons demandées, calculés une fois par tuple d'années
+        key = tuple(years)
+        with self._lock:
+            view = self._views.get(key)
+        if view is None:
+            view = self._build_view(key)
+            with self._lock:
+                self._views[key] = view
+        return view
+
+    def _build_view(self, years):
+        # Mêmes lignes et mêmes index que la concaténation suivie du filtrage sur les années
+        races = self.races[self.races['year'].isin(years)]
+        placeholders = placeholder_calendar(self.races, years)
+        if not pd.api.types.is_datetime64_any_dtype(self.races['date']):
+            # Dates au même format que celles de races.csv : une colonne de type unique reste convertible en Arrow
+            # (sinon Streamlit la corrige à chaque affichage)
+            placeholders['date'] = placeholders['date'].dt.strftime('%Y-%m-%d')
+        placeholders.index = pd.RangeIndex(len(self.races), len(self.races) + len(placeholders))
+        races_filtered = pd.concat([races, placeholders])
+        results_filtered = self.results[np.isin(self._result_years, list(years))]
+        return races_filtered, results_filtered
+
+    def totals(self, years):
+        # (points par constructeur, points par pilote) des saisons demandées, cumulés à partir du cube et regroupés
+        # par nom comme dans les graphiques ; mémorisés par tuple d'années
+        key = tuple(years)
+        with self._lock:
+            totals = self._totals.get(key)
+        if totals is None:
+            totals = self._build_totals(key)
+            with self._lock:
+                self._totals[key] = totals
+        return totals
+
+    def _build_totals(self, years):
+        cube, (constructor_groups, constructor_labels), (driver_groups, driver_labels) = self._name_groups()
+        mask = cube.season_mask(years)
+        by_constructor = _grouped_totals(cube.season_constructors[mask].sum(axis=0), constructor_groups,
+                                         constructor_labels)
+        by_driver = _grouped_totals(cube.season_drivers[mask].sum(axis=0), driver_groups, driver_labels)
+        return by_constructor, by_driver
+
+    def _name_groups(self):
+        # Groupe (par nom) de chaque constructeur et de chaque pilote du cube, calculé une fois
+        cube = self.cube
+        with self._lock:
+            if self._groups is None:
+                _, _, _, constructors_df, drivers_df = self.sources
+                constructors = _group_by_names({
+                    'name_constructor': _lookup(cube.constructor_ids, constructors_df, 'constructorid', 'name')})
+                drivers = _group_by_names({
+                    'driver_forename': _lookup(cube.driver_ids, drivers_df, 'driverid', 'forename'),
+                    'driver_surname': _lookup(cube.driver_ids, drivers_df, 'driverid', 'surname')})
+                self._groups = (cube, constructors, drivers)
+            return self._groups
+
+def _group_by_names(columns):
+    # Numéro de groupe de chaque identifiant (-1 sans nom) et noms des groupes, dans l'ordre d'un groupby sur ces noms
+    # (ordre des codes des catégorielles)
+    codes = np.column_stack([values.codes for values in columns.values()])
+    known = (codes >= 0).all(axis=1)
+    unique_codes, inverse = np.unique(codes[known], axis=0, return_inverse=True)
+    groups = np.full(len(codes), -1, dtype=np.int64)
+    groups[known] = inverse.ravel()
+    labels = pd.DataFrame({name: pd.Categorical.from_codes(unique_codes[:, i], categories=values.categories)
+                           for i, (name, values) in enumerate(columns.items())})
+    return groups, labels
+
+def _grouped_totals(values, groups, labels):
+    # Cumuls par identifiant -> cumuls par groupe de noms, sans les groupes absents des saisons demandées
+    known = groups >= 0
+    totals = np.zeros((len(labels), len(CUBE_MEASURES)))
+    np.add.at(totals, groups[known], values[known])
+    present = totals[:, CUBE_MEASURES.index('entries')] > 0
+    columns = {column: labels[column].array[present] for column in labels.columns}
+    for position, measure in enumerate(CUBE_MEASURES):
+        column = totals[present, position]
+        columns[measure] = column if measure == 'points' else column.astype(np.int64)
+    return pd.DataFrame(columns)
+
+_last_views = []
+_last_lock = threading.Lock()
+
+def season_views(races_df, results_df, seasons_df, constructors_df, drivers_df):
+    # Réutilise les vues tant que les mêmes objets tables sont passés (tables servies par le cache du chargeur) ;
+    # sinon les nouvelles vues reprennent les précédentes si les résultats n'ont été que prolongés
+    sources = (races_df, results_df, seasons_df, constructors_df, drivers_df)
+    with _last_lock:
+        previous = _last_views[0] if _last_views else None
+    if previous is not None and all(a is b for a, b in zip(previous.sources, sources)):
+        return previous
+    views = SeasonViews(*sources, previous=previous)
+    with _last_lock:
+        _last_views[:] = [views]
+    return views
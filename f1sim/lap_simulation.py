@@ -0,0 +1,137 @@
+"""Simulateur stochastique tour par tour : arrêts aux stands, voiture de sécurité et météo.
+
+Le rythme de chaque pilote est ajusté sur temps_par_courses.csv : rapport entre son meilleur tour et le meilleur
+tour médian de la course (moyenne et dispersion d'une course à l'autre), et écart entre son tour moyen et son
+meilleur tour pour la variabilité d'un tour à l'autre. Toutes les courses simulées avancent ensemble, un tour à la
+fois, sous forme de tableaux (simulations, pilotes).
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from f1sim.monte_carlo import PositionAccumulator, rank_rows
+from f1sim.spans import traced
+from f1sim.times import parse_time_column
+
+# Durée de course et tour de référence lorsque la course n'est pas dans les données
+DEFAULT_LAPS = 57
+DEFAULT_LAP_MS = 95_000.0
+
+# Le tour de référence d'un pilote au rythme médian est un peu plus lent que le meilleur tour médian
+BASE_LAP_MARGIN = 1.03
+# Part de l'écart tour moyen / meilleur tour attribuée à la variabilité propre à chaque tour
+LAP_NOISE_SHARE = 0.25
+
+PIT_LOSS_MS = (20_000.0, 25_000.0)
+PIT_STOPS = (1, 2)
+SAFETY_CAR_PROBABILITY = 0.5
+SAFETY_CAR_LAPS = (3, 5)
+SAFETY_CAR_SLOWDOWN = 1.4
+SAFETY_CAR_GAP_MS = 500.0
+GRID_GAP_MS = 250.0
+# Pluie : allongement des tours et variabilité multipliée par le facteur weather_influence
+WEATHER_LAP_SCALE = 0.25
+
+def fit_driver_pace(temps_par_courses_df):
+    # Paramètres de rythme par driverid : 'pace', 'pace_std', 'lap_noise'
+    df = temps_par_courses_df[['race_id', 'driverid', 'laps', 'milliseconds', 'fastestlaptime']].copy()
+    df['fastest'] = parse_time_column(df['fastestlaptime']).astype(float)
+    df['mean_lap'] = pd.to_numeric(df['milliseconds'], errors='coerce').astype(float) / df['laps']
+    df['ratio'] = df['fastest'] / df.groupby('race_id')['fastest'].transform('median')
+    df['spread'] = df['mean_lap'] / df['fastest'] - 1
+    fit = df.groupby('driverid').agg(pace=('ratio', 'mean'), pace_std=('ratio', 'std'), spread=('spread', 'median'))
+    fit['pace'] = fit['pace'].fillna(fit['pace'].median())
+    fit['pace_std'] = fit['pace_std'].fillna(fit['pace_std'].median())
+    fit['lap_noise'] = fit['spread'].fillna(df['spread'].median()) * LAP_NOISE_SHARE
+    return fit[['pace', 'pace_std', 'lap_noise']]
+
+def race_rows(temps_par_courses_df, race_id):
+    # Lignes d'une course par les groupes de race_id (vide si la course est absente) ; avec un RaceIndex déjà
+    # construit, RaceIndex.race(race_id) donne la même tranche sans parcourir la table
+    positions = temps_par_courses_df.groupby('race_id', sort=False).indices.get(race_id)
+    return temps_par_courses_df.iloc[positions if positions is not None else []]
+
+def race_profile(race_results):
+    # Nombre de tours et tour de référence (ms) d'une course, à partir de ses seules lignes
+    if race_results.empty:
+        return DEFAULT_LAPS, DEFAULT_LAP_MS
+    fastest = parse_time_column(race_results['fastestlaptime']).astype(float).median()
+    return int(race_results['laps'].max()), float(fastest) * BASE_LAP_MARGIN
+
+def _pit_laps(rng, n_runs, n_drivers, n_laps):
+    # Tour du premier et du second arrêt (-1 si pas de second arrêt), répartis dans la course
+    first = rng.integers(n_laps // 4, n_laps // 2 + 1, size=(n_runs, n_drivers))
+    second = rng.integers(n_laps // 2 + 1, 3 * n_laps // 4 + 1, size=(n_runs, n_drivers))
+    two_stops = rng.integers(PIT_STOPS[0], PIT_STOPS[1] + 1, size=(n_runs, n_drivers)) == 2
+    return first, np.where(two_stops, second, -1)
+
+def _safety_car_laps(rng, n_runs, n_laps):
+    # Pour chaque simulation : premier tour et nombre de tours sous voiture de sécurité (0 si aucune)
+    deployed = rng.random(n_runs) < SAFETY_CAR_PROBABILITY
+    start = rng.integers(1, max(n_laps - SAFETY_CAR_LAPS[1], 2), size=n_runs)
+    length = np.where(deployed, rng.integers(SAFETY_CAR_LAPS[0], SAFETY_CAR_LAPS[1] + 1, size=n_runs), 0)
+    return start, length
+
+def simulate_lap_races(pace, pace_std, lap_noise, n_laps, base_lap_ms, influence_factor=1.0, n_runs=10_000,
+                       seed=None):
+    # pace, pace_std, lap_noise : tableaux par pilote (voir fit_driver_pace)
+    # Retourne l'accumulateur des positions (départ = grille, arrivée) et les positions tour par tour de la 1re course
+    rng = np.random.default_rng(seed)
+    n_drivers = len(pace)
+    weather_scale = 1 + (influence_factor - 1) * WEATHER_LAP_SCALE
+    noise = lap_noise * influence_factor
+
+    # Forme du jour, puis qualification : la grille suit un tour lancé
+    day_pace = pace + rng.standard_normal((n_runs, n_drivers)) * pace_std
+    qualifying = day_pace * (1 + rng.standard_normal((n_runs, n_drivers)) * noise)
+    grid = rank_rows(qualifying)
+    cumulative = grid * GRID_GAP_MS
+
+    first_stop, second_stop = _pit_laps(rng, n_runs, n_drivers, n_laps)
+    sc_start, sc_length = _safety_car_laps(rng, n_runs, n_laps)
+    lap_positions = np.empty((n_laps, n_drivers), dtype=np.int64)
+
+    for lap in range(n_laps):
+        lap_ms = base_lap_ms * weather_scale * day_pace * (1 + rng.standard_normal((n_runs, n_drivers)) * noise)
+        under_sc = (lap >= sc_start) & (lap < sc_start + sc_length)
+        if under_sc.any():
+            lap_ms[under_sc] = base_lap_ms * weather_scale * SAFETY_CAR_SLOWDOWN
+        # Temps perdu aux stands ajouté après le rythme de la voiture de sécurité : un arrêt sous neutralisation coûte
+        # toujours le passage par la voie des stands
+        lap_ms += ((first_stop == lap) | (second_stop == lap)) * rng.uniform(*PIT_LOSS_MS, size=(n_runs, n_drivers))
+        cumulative += lap_ms
+        # Au déploiement, le peloton se regroupe derrière le leader dans l'ordre de course
+        bunching = under_sc & (lap == sc_start)
+        if bunching.any():
+            order = rank_rows(cumulative[bunching])
+            cumulative[bunching] = cumulative[bunching].min(axis=1, keepdims=True) + order * SAFETY_CAR_GAP_MS
+        lap_positions[lap] = rank_rows(cumulative[:1])[0]
+
+    accumulator = PositionAccumulator(n_drivers)
+    accumulator.update(grid, rank_rows(cumulative))
+    return accumulator, lap_positions + 1
+
+@traced()
+def simulate_race_laps(temps_par_courses_df, race_id, driver_ids, driver_names=None, influence_factor=1.0,
+                       n_runs=10_000, seed=None, race_results=None):
+    # Point d'entrée : ajuste les rythmes, simule n_runs courses complètes et résume les positions
+    # race_results : lignes de la course (RaceIndex.race), retrouvées dans temps_par_courses_df si absentes
+    start = time.perf_counter()
+    fit = fit_driver_pace(temps_par_courses_df)
+    fit = fit.reindex(driver_ids).fillna(fit.median())
+    if race_results is None:
+        race_results = race_rows(temps_par_courses_df, race_id)
+    n_laps, base_lap_ms = race_profile(race_results)
+    accumulator, lap_positions = simulate_lap_races(fit['pace'].to_numpy(), fit['pace_std'].to_numpy(),
+                                                    fit['lap_noise'].to_numpy(), n_laps, base_lap_ms,
+                                                    influence_factor, n_runs, seed)
+    driver_names = driver_names or {}
+    names = [driver_names.get(driver_id, str(driver_id)) for driver_id in driver_ids]
+    result = accumulator.result(names)
+    result['lap_positions'] = pd.DataFrame(lap_positions, index=pd.Index(np.arange(1, n_laps + 1), name='Tour'),
+                                           columns=names)
+    elapsed = time.perf_counter() - start
+    result['seconds'] = elapsed
+    result['races_per_second'] = n_runs / elapsed if elapsed > 0 else float('inf')
+    return result
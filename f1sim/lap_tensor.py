@@ -0,0 +1,157 @@
+"""Temps au tour en tenseur dense sur disque : course x emplacement de pilote x tour, en millisecondes.
+
+Le tenseur (float32, NaN pour un tour absent) est écrit à côté des temps au tour nettoyés dans un fichier .npy,
+avec un petit index .npz : raceid de chaque course et driverid de chaque emplacement. Il est ouvert avec
+numpy.memmap : une course, un pilote ou une plage de tours est une vue sans copie, et les processus qui l'ouvrent
+partagent les pages du cache du système au lieu de garder chacun sa copie des temps au tour.
+
+L'écriture lit les temps au tour par parties (voir f1sim.analytics) en deux passes : disposition (courses,
+emplacements, nombre de tours), puis remplissage du fichier projeté en mémoire. La mémoire utilisée ne dépend pas
+de la taille du fichier source.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from f1sim.analytics import lap_milliseconds, plan_parts, read_part
+from f1sim.loader import load_computed
+from f1sim.store import snapshot_path
+
+TENSOR_SUFFIX = '.tensor.npy'
+INDEX_SUFFIX = '.tensor.index.npz'
+TENSOR_DTYPE = np.float32
+COLUMNS = ['raceid', 'driverid', 'lap', 'milliseconds']
+# Décalage des clés (course, pilote) : course * DRIVER_KEY + driverid
+DRIVER_KEY = 1 << 20
+
+def tensor_paths(lap_times_path):
+    base = os.path.splitext(lap_times_path)[0]
+    return base + TENSOR_SUFFIX, base + INDEX_SUFFIX
+
+def _layout(parts):
+    # Première passe : couples (course, pilote) distincts et nombre de tours maximal
+    pairs = []
+    n_laps = 0
+    for part in parts:
+        chunk = read_part(part, COLUMNS)
+        pairs.append(np.unique(chunk['raceid'].to_numpy(dtype=np.int64) * DRIVER_KEY
+                               + chunk['driverid'].to_numpy(dtype=np.int64)))
+        if len(chunk):
+            n_laps = max(n_laps, int(chunk['lap'].max()))
+    keys = np.unique(np.concatenate(pairs)) if pairs else np.array([], dtype=np.int64)
+    race_ids, race_index = np.unique(keys // DRIVER_KEY, return_inverse=True)
+    # Emplacement de chaque pilote dans sa course : 0, 1, 2, ... par ordre de driverid (les clés sont triées)
+    starts = np.searchsorted(race_index, np.arange(len(race_ids)))
+    slots = np.arange(len(keys)) - starts[race_index]
+    n_slots = int(slots.max()) + 1 if len(slots) else 0
+    drivers = np.full((len(race_ids), n_slots), -1, dtype=np.int64)
+    drivers[race_index, slots] = keys % DRIVER_KEY
+    return keys, race_index, slots, race_ids, drivers, n_laps
+
+def _write_replacing(path, write):
+    # write(fichier temporaire) puis renommage sur path. Le fichier temporaire est propre à l'appel et placé dans le
+    # dossier de destination : plusieurs processus qui reconstruisent le tenseur en même temps n'écrivent jamais dans
+    # le même fichier, et chacun publie un fichier complet
+    directory, name = os.path.split(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+    os.close(descriptor)
+    try:
+        write(temporary)
+        # mkstemp crée le fichier en 0600 : les autres utilisateurs doivent pouvoir l'ouvrir en lecture
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+def _write_index(path, race_ids, drivers):
+    with open(path, 'wb') as f:
+        np.savez(f, races=race_ids, drivers=drivers)
+
+def write_lap_tensor(lap_times_path):
+    # Écrit le tenseur et son index à partir des temps au tour (CSV ou instantané Parquet) ; fichiers remplacés
+    # d'un coup, un lecteur ne voit jamais un tenseur à moitié écrit
+    tensor_path, index_path = tensor_paths(lap_times_path)
+    parts = plan_parts(lap_times_path)
+    keys, race_index, slots, race_ids, drivers, n_laps = _layout(parts)
+    shape = (len(race_ids), drivers.shape[1], n_laps)
+    _write_replacing(tensor_path, lambda path: _fill_tensor(path, shape, parts, keys, race_index, slots))
+    _write_replacing(index_path, lambda path: _write_index(path, race_ids, drivers))
+    return tensor_path, index_path
+
+def _fill_tensor(path, shape, parts, keys, race_index, slots):
+    lap_times = np.lib.format.open_memmap(path, mode='w+', dtype=TENSOR_DTYPE, shape=shape)
+    lap_times[...] = np.nan
+    # Deuxième passe : chaque partie est rangée à sa place dans le fichier projeté
+    for part in parts:
+        chunk = read_part(part, COLUMNS)
+        position = np.searchsorted(keys, chunk['raceid'].to_numpy(dtype=np.int64) * DRIVER_KEY
+                                   + chunk['driverid'].to_numpy(dtype=np.int64))
+        lap = chunk['lap'].to_numpy(dtype=np.int64) - 1
+        lap_times[race_index[position], slots[position], lap] = lap_milliseconds(chunk).to_numpy(
+            dtype=TENSOR_DTYPE, na_value=np.nan)
+    lap_times.flush()
+    del lap_times
+
+def _is_stale(lap_times_path):
+    tensor_path, index_path = tensor_paths(lap_times_path)
+    if not (os.path.exists(tensor_path) and os.path.exists(index_path)):
+        return True
+    built = min(os.path.getmtime(tensor_path), os.path.getmtime(index_path))
+    sources = [path for path in (lap_times_path, snapshot_path(lap_times_path)) if os.path.exists(path)]
+    return any(os.path.getmtime(path) > built for path in sources)
+
+class LapTensor:
+    # lap_times : tableau projeté en lecture seule (courses, emplacements, tours) ; races : raceid de chaque course
+    # (trié) ; drivers : driverid de chaque emplacement (-1 si libre). Les méthodes retournent des vues à ne pas modifier
+    def __init__(self, lap_times, races, drivers):
+        self.lap_times = lap_times
+        self.races = races
+        self.drivers = drivers
+
+    @property
+    def n_laps(self):
+        return self.lap_times.shape[2]
+
+    def race_position(self, race_id):
+        position = int(np.searchsorted(self.races, race_id))
+        if position >= len(self.races) or self.races[position] != race_id:
+            return None
+        return position
+
+    def race(self, race_id, laps=slice(None)):
+        # Emplacements x tours de la course (None si la course est absente) ; laps : plage de tours (indices 0..)
+        position = self.race_position(race_id)
+        return None if position is None else self.lap_times[position, :, laps]
+
+    def race_drivers(self, race_id):
+        position = self.race_position(race_id)
+        return None if position is None else self.drivers[position]
+
+    def driver(self, race_id, driver_id, laps=slice(None)):
+        # Tours d'un pilote dans une course (None s'il n'y a pas roulé)
+        position = self.race_position(race_id)
+        if position is None:
+            return None
+        slots = np.flatnonzero(self.drivers[position] == driver_id)
+        return self.lap_times[position, slots[0], laps] if len(slots) else None
+
+def open_lap_tensor(lap_times_path, build=True):
+    # Ouvre le tenseur des temps au tour, écrit (ou réécrit s'il est plus ancien que la source) au besoin
+    tensor_path, index_path = tensor_paths(lap_times_path)
+    if _is_stale(lap_times_path):
+        if not build:
+            raise FileNotFoundError(f"Tenseur des temps au tour absent ou périmé : {tensor_path}")
+        write_lap_tensor(lap_times_path)
+    with np.load(index_path) as index:
+        races, drivers = index['races'], index['drivers']
+    lap_times = np.load(tensor_path, mmap_mode='r')
+    if lap_times.shape[:2] != drivers.shape:
+        # Tenseur remplacé entre les deux lectures : on relit l'index
+        return open_lap_tensor(lap_times_path, build=False)
+    return LapTensor(lap_times, races, drivers)
+
+def load_lap_tensor(path):
+    # Tenseur ouvert une fois par processus, rouvert quand les temps au tour changent sur disque
+    return load_computed([path], open_lap_tensor)
@@ -0,0 +1,184 @@
+"""Chargement des tables avec un cache partagé par tout le processus.
+
+Streamlit réexécute le script à chaque interaction : les tables sont lues (et préparées) une seule fois,
+puis servies depuis le cache tant que le fichier source n'a pas été modifié sur disque. Chaque fichier n'est lu
+qu'une fois, quelles que soient les préparations qui en dérivent. Plusieurs tables se chargent en parallèle sur un
+pool de threads (load_tables, preload) : le démarrage dure alors autant que la lecture du plus gros fichier.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from f1sim.spans import record_span, span
+from f1sim.store import read_table, snapshot_path
+
+_cache = {}
+_lock = threading.Lock()
+# Un verrou par entrée du cache : deux threads qui demandent la même table attendent une seule lecture, et les
+# lectures de tables différentes se font en parallèle
+_entry_locks = {}
+
+# Durée de la dernière lecture effective (hors cache) de chaque fichier, pour le rapport de démarrage
+load_timings = {}
+
+def _signature(path):
+    # Date de modification et taille du CSV et de son instantané : toute réécriture invalide le cache
+    signature = []
+    for candidate in (path, snapshot_path(path)):
+        try:
+            stat = os.stat(candidate)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def _entry_lock(key):
+    with _lock:
+        return _entry_locks.setdefault(key, threading.Lock())
+
+def load_table(path, prepare=None, **read_kwargs):
+    # Retourne une copie superficielle de la table en cache : les colonnes ajoutées ou remplacées par l'appelant
+    # ne touchent pas la version partagée entre les sessions (les modifications en place restent interdites)
+    key = (os.path.abspath(path), prepare, tuple(sorted(read_kwargs.items())))
+    signature = _signature(path)
+    with _entry_lock(key):
+        with _lock:
+            entry = _cache.get(key)
+        if entry is None or entry[0] != signature:
+            start = time.perf_counter()
+            name = os.path.basename(path)
+            if prepare is None:
+                with span(f'chargement {name}'):
+                    df = read_table(path, **read_kwargs)
+                load_timings[name] = time.perf_counter() - start
+            else:
+                # Préparation à partir de la table brute en cache : le fichier n'est pas relu
+                df = load_table(path, **read_kwargs)
+                with span(f'préparation {name}', prepare=prepare.__name__):
+                    df = prepare(df)
+                load_timings[f'{name} ({prepare.__name__})'] = time.perf_counter() - start
+            entry = (signature, df)
+            with _lock:
+                _cache[key] = entry
+    # Une préparation peut produire autre chose qu'un DataFrame (tableaux dérivés) : partagé tel quel, en lecture seule
+    if isinstance(entry[1], pd.DataFrame):
+        return entry[1].copy(deep=False)
+    return entry[1]
+
+def _request(request):
+    # Chemin seul ou couple (chemin, préparation)
+    return (request, None) if isinstance(request, (str, os.PathLike)) else request
+
+def load_tables(requests, max_workers=None):
+    # Charge les tables demandées en parallèle (la lecture CSV et Parquet libère le GIL) ; retourne les tables dans
+    # l'ordre des demandes (None pour un fichier absent) et les durées : temps écoulé pour chaque table et au total
+    requests = [_request(request) for request in requests]
+    start = time.perf_counter()
+
+    def load(request):
+        path, prepare = request
+        started = time.perf_counter()
+        try:
+            table = load_table(path, prepare)
+        except FileNotFoundError:
+            table = None
+        return table, started, time.perf_counter() - started
+
+    with span('chargement des tables', tables=len(requests)):
+        with ThreadPoolExecutor(max_workers=max_workers or len(requests) or 1) as executor:
+            loaded = list(executor.map(load, requests))
+        timings = {}
+        for (path, prepare), (_, started, seconds) in zip(requests, loaded):
+            label = os.path.basename(path) if prepare is None else f'{os.path.basename(path)} ({prepare.__name__})'
+            timings[label] = seconds
+            # Étapes des threads de chargement rattachées à l'exécution en cours
+            record_span(f'chargement {label}', seconds, started)
+    timings['total'] = time.perf_counter() - start
+    return [table for table, _, _ in loaded], timings
+
+def _needs_load(path, prepare):
+    signature = _signature(path)
+    if all(part is None for part in signature):
+        return False
+    with _lock:
+        entry = _cache.get((os.path.abspath(path), prepare, ()))
+    return entry is None or entry[0] != signature
+
+def preload(requests, max_workers=None):
+    # Lance load_tables en arrière-plan et rend la main aussitôt : un load_table ultérieur sur une table en cours de
+    # lecture attend la fin de cette lecture au lieu de relire le fichier. Rien n'est lancé si tout est déjà en cache
+    requests = [_request(request) for request in requests]
+    if not any(_needs_load(path, prepare) for path, prepare in requests):
+        return None
+    thread = threading.Thread(target=load_tables, args=(requests, max_workers), name='f1sim-preload', daemon=True)
+    thread.start()
+    return thread
+
+def load_combined(paths, build):
+    # Structure dérivée de plusieurs tables (build reçoit les tables dans l'ordre de paths), recalculée seulement
+    # lorsque l'un des fichiers change ; partagée telle quelle, en lecture seule
+    key = (tuple(os.path.abspath(path) for path in paths), build)
+    signature = tuple(_signature(path) for path in paths)
+    with _lock:
+        entry = _cache.get(key)
+    if entry is None or entry[0] != signature:
+        tables, _ = load_tables(paths)
+        missing = [path for path, table in zip(paths, tables) if table is None]
+        if missing:
+            raise FileNotFoundError(f"Fichier introuvable : {', '.join(missing)}")
+        entry = (signature, build(*tables))
+        with _lock:
+            _cache[key] = entry
+    return entry[1]
+
+def load_computed(paths, compute):
+    # Comme load_combined, mais compute reçoit les chemins et lit lui-même les fichiers (par exemple par blocs) ;
+    # un chemin absent compte comme une version du fichier
+    key = (tuple(os.path.abspath(path) for path in paths), compute)
+    signature = tuple(_signature(path) for path in paths)
+    with _lock:
+        entry = _cache.get(key)
+    if entry is None or entry[0] != signature:
+        entry = (signature, compute(*paths))
+        with _lock:
+            _cache[key] = entry
+    return entry[1]
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+def clean_coordinates(df, lat_col, lng_col):
+    # Les coordonnées exportées avec une virgule décimale sont converties en flottants
+    df = df.copy(deep=False)
+    df[lat_col] = df[lat_col].astype(str).str.replace(',', '.').astype(float)
+    df[lng_col] = df[lng_col].astype(str).str.replace(',', '.').astype(float)
+    return df
+
+def prepare_weather(df):
+    return clean_coordinates(df, 'fact_latitude', 'fact_longitude')
+
+def prepare_circuits(df):
+    return clean_coordinates(df, 'lat', 'lng')
+
+def prepare_temps_par_courses(df):
+    # S'assurer que la colonne 'milliseconds' est bien numérique
+    df = df.copy(deep=False)
+    df['milliseconds'] = pd.to_numeric(df['milliseconds'], errors='coerce')
+    df = df.dropna(subset=['milliseconds'])
+    # Nom complet du pilote, calculé une fois en colonne catégorielle
+    df['Nom du pilote'] = (df['driver_forename'].astype(str) + ' ' + df['driver_surname'].astype(str)).astype('category')
+    return df
+
+def load_temps_par_courses(path):
+    return load_table(path, prepare=prepare_temps_par_courses)
+
+def load_weather(path):
+    return load_table(path, prepare=prepare_weather)
+
+def load_circuits(path):
+    return load_table(path, prepare=prepare_circuits)
@@ -0,0 +1,135 @@
+"""Moteur Monte Carlo vectorisé : N courses simulées d'un coup avec le modèle des notes et de la météo.
+
+Modèle identique à simulate_race_with_probability_and_weather : pour chaque pilote,
+score = moyenne (départ ou arrivée) * (100 - note) / 100 * facteur météo * variabilité uniforme [0.8, 1.2],
+le même tirage de variabilité servant pour le départ et l'arrivée. Le classement se fait par argsort ligne à ligne.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from f1sim.drivers import as_driver_table
+from f1sim.spans import traced
+
+DEFAULT_BATCH_SIZE = 50_000
+VARIABILITY_RANGE = (0.8, 1.2)
+
+# Quantile de la loi normale pour un intervalle de confiance à 95 %
+Z_95 = 1.959963984540054
+
+def rank_rows(scores):
+    # Position (0 = premier) de chaque pilote dans chaque simulation, le plus petit score en tête
+    order = np.argsort(scores, axis=1, kind='stable')
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.broadcast_to(np.arange(scores.shape[1]), scores.shape), axis=1)
+    return positions
+
+def count_positions(positions):
+    # Histogramme pilote x position accumulé sur toutes les lignes
+    n_drivers = positions.shape[1]
+    flat = (np.arange(n_drivers) * n_drivers + positions).ravel()
+    return np.bincount(flat, minlength=n_drivers * n_drivers).reshape(n_drivers, n_drivers)
+
+def base_scores(drivers, influence_factor):
+    # Partie déterministe des scores de départ et d'arrivée, avant la variabilité (drivers : DriverTable)
+    weight = (100 - drivers.ratings) / 100 * influence_factor
+    return drivers.average_start * weight, drivers.average_finish * weight
+
+def simulate_positions(start_base, finish_base, n_simulations, rng):
+    # Un bloc de simulations : tableaux (n_simulations, pilotes) des positions de départ et d'arrivée
+    variability = rng.uniform(*VARIABILITY_RANGE, size=(n_simulations, len(start_base)))
+    return rank_rows(start_base * variability), rank_rows(finish_base * variability)
+
+def position_table(names, counts, n_simulations):
+    columns = [f"P{i}" for i in range(1, counts.shape[1] + 1)]
+    return pd.DataFrame(counts / n_simulations, index=pd.Index(names, name='Nom du pilote'), columns=columns)
+
+def summarize(names, start_counts, finish_counts, n_simulations):
+    positions = np.arange(1, start_counts.shape[1] + 1)
+    summary = pd.DataFrame({
+        'Victoire': finish_counts[:, 0] / n_simulations,
+        'Podium': finish_counts[:, :3].sum(axis=1) / n_simulations,
+        'Position de départ moyenne': start_counts @ positions / n_simulations,
+        'Position finale moyenne': finish_counts @ positions / n_simulations,
+    }, index=pd.Index(names, name='Nom du pilote'))
+    return summary.sort_values('Position finale moyenne')
+
+class PositionAccumulator:
+    # Histogrammes pilote x position mis à jour bloc par bloc : mémoire O(pilotes²) quel que soit le nombre de courses
+    def __init__(self, n_drivers):
+        self.start_counts = np.zeros((n_drivers, n_drivers), dtype=np.int64)
+        self.finish_counts = np.zeros((n_drivers, n_drivers), dtype=np.int64)
+        self.n_simulations = 0
+
+    def update(self, start_positions, finish_positions):
+        self.start_counts += count_positions(start_positions)
+        self.finish_counts += count_positions(finish_positions)
+        self.n_simulations += len(finish_positions)
+
+    def mean_positions(self):
+        positions = np.arange(1, self.finish_counts.shape[1] + 1)
+        return self.start_counts @ positions / self.n_simulations, self.finish_counts @ positions / self.n_simulations
+
+    def win_podium_probabilities(self):
+        return self.finish_counts[:, 0] / self.n_simulations, self.finish_counts[:, :3].sum(axis=1) / self.n_simulations
+
+    def half_width(self, z=Z_95):
+        # Demi-largeur maximale des intervalles de Wilson sur les probabilités de victoire et de podium
+        n = self.n_simulations
+        p = np.concatenate(self.win_podium_probabilities())
+        return float(np.max(z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))))
+
+    def result(self, names):
+        return {
+            'summary': summarize(names, self.start_counts, self.finish_counts, self.n_simulations),
+            'finish_probabilities': position_table(names, self.finish_counts, self.n_simulations),
+            'start_probabilities': position_table(names, self.start_counts, self.n_simulations),
+            'n_simulations': self.n_simulations,
+        }
+
+def _finish(result, start):
+    elapsed = time.perf_counter() - start
+    result['seconds'] = elapsed
+    result['races_per_second'] = result['n_simulations'] / elapsed if elapsed > 0 else float('inf')
+    return result
+
+@traced()
+def simulate_race_batch(race_data, influence_factor, n_simulations, seed=None, batch_size=DEFAULT_BATCH_SIZE):
+    # race_data : DriverTable, ou DataFrame 'Nom du pilote', 'Rating', 'Average_start', 'Average_finish'
+    # Les simulations sont traitées par blocs pour que la mémoire ne dépende pas de n_simulations
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    drivers = as_driver_table(race_data)
+    start_base, finish_base = base_scores(drivers, influence_factor)
+    accumulator = PositionAccumulator(len(start_base))
+    while accumulator.n_simulations < n_simulations:
+        size = min(batch_size, n_simulations - accumulator.n_simulations)
+        accumulator.update(*simulate_positions(start_base, finish_base, size, rng))
+    return _finish(accumulator.result(drivers.names.tolist()), start)
+
+@traced()
+def simulate_race_adaptive(race_data, influence_factor, tolerance, max_simulations=10_000_000, seed=None,
+                           batch_size=10_000, z=Z_95):
+    # Ajoute des blocs de simulations jusqu'à ce que tous les intervalles de confiance (victoire et podium)
+    # aient une demi-largeur inférieure à tolerance, ou que max_simulations soit atteint
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    drivers = as_driver_table(race_data)
+    start_base, finish_base = base_scores(drivers, influence_factor)
+    names = drivers.names.tolist()
+    accumulator = PositionAccumulator(len(start_base))
+    history = []
+    half_width = float('inf')
+    while accumulator.n_simulations < max_simulations and half_width >= tolerance:
+        size = min(batch_size, max_simulations - accumulator.n_simulations)
+        accumulator.update(*simulate_positions(start_base, finish_base, size, rng))
+        half_width = accumulator.half_width(z)
+        win, _ = accumulator.win_podium_probabilities()
+        history.append({'Simulations': accumulator.n_simulations, 'Demi-largeur max': half_width,
+                        **dict(zip(names, win))})
+    result = accumulator.result(names)
+    result['half_width'] = half_width
+    result['converged'] = half_width < tolerance
+    result['history'] = pd.DataFrame(history).set_index('Simulations')
+    return _finish(result, start)
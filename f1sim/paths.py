@@ -0,0 +1,14 @@
+"""Emplacement des fichiers de données.
+
+Les applications et la ligne de commande cherchent leurs tables dans un répertoire de données : celui passé en
+argument, sinon celui de la variable d'environnement F1SIM_DATA_DIR, sinon le répertoire courant.
+"""
+import os
+
+DATA_DIR_ENV = 'F1SIM_DATA_DIR'
+
+def data_dir(directory=None):
+    return directory or os.environ.get(DATA_DIR_ENV) or '.'
+
+def data_path(name, directory=None):
+    return os.path.join(data_dir(directory), name)
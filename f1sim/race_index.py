@@ -0,0 +1,28 @@
+"""Index par course de temps_par_courses : les lignes d'une course sont une tranche contiguë, obtenue en O(1)."""
+import numpy as np
+
+from f1sim.loader import load_table, prepare_temps_par_courses
+
+class RaceIndex:
+    # Les résultats sont triés une fois par race_id ; chaque course correspond à un intervalle [début, fin)
+    def __init__(self, df, key='race_id'):
+        self.frame = df.sort_values(key, kind='stable').reset_index(drop=True)
+        race_ids, starts, counts = np.unique(self.frame[key].to_numpy(), return_index=True, return_counts=True)
+        self.race_ids = race_ids
+        self._bounds = {int(race_id): (int(start), int(start + count))
+                        for race_id, start, count in zip(race_ids, starts, counts)}
+
+    def race(self, race_id):
+        # Tranche sans copie des lignes de la course (vide si la course est inconnue) ; à ne pas modifier
+        start, stop = self._bounds.get(int(race_id), (0, 0))
+        return self.frame.iloc[start:stop]
+
+    def __contains__(self, race_id):
+        return int(race_id) in self._bounds
+
+def build_race_index(df):
+    return RaceIndex(prepare_temps_par_courses(df))
+
+def load_race_index(temps_par_courses_path):
+    # Construit une fois, partagé par toutes les sessions via le cache du chargeur
+    return load_table(temps_par_courses_path, prepare=build_race_index)
@@ -0,0 +1,48 @@
+"""Relecture tour par tour des courses réelles à partir des temps au tour nettoyés (sortie de clean.py).
+
+Les temps sont lus dans le tenseur course x pilote x tour projeté en mémoire (f1sim.lap_tensor) : seule la course
+affichée est cumulée, et l'ordre de course à chaque tour est obtenu par un seul argsort sur l'axe des pilotes.
+"""
+import numpy as np
+import pandas as pd
+
+from f1sim.charts import position_figure
+from f1sim.lap_tensor import load_lap_tensor
+from f1sim.spans import traced
+
+def load_lap_replay(path):
+    # Tenseur des temps au tour projeté en mémoire (écrit par clean.py, sinon au premier appel)
+    return load_lap_tensor(path)
+
+def running_order(cumulative):
+    # Position (1 = en tête) de chaque pilote à chaque tour ; NaN pour les pilotes qui ne roulent plus
+    keys = np.where(np.isnan(cumulative), np.inf, cumulative)
+    order = np.argsort(keys, axis=1, kind='stable')
+    positions = np.empty(cumulative.shape, dtype=float)
+    ranks = np.broadcast_to(np.arange(1, cumulative.shape[1] + 1)[None, :, None], cumulative.shape)
+    np.put_along_axis(positions, order, ranks, axis=1)
+    positions[np.isnan(cumulative)] = np.nan
+    return positions
+
+@traced()
+def race_positions(tensor, race_id):
+    # Positions d'une course : DataFrame tour x driverid ; seule la tranche de la course est lue dans le tenseur
+    lap_times = tensor.race(race_id)
+    if lap_times is None:
+        return None
+    drivers = tensor.race_drivers(race_id)
+    present = drivers >= 0
+    # Un tour manquant (abandon) rend le temps cumulé NaN pour la suite de la course
+    cumulative = np.cumsum(lap_times[present], axis=1, dtype=np.float64)
+    positions = running_order(cumulative[None])[0]
+    laps = np.arange(1, positions.shape[1] + 1)
+    df = pd.DataFrame(positions.T, index=pd.Index(laps, name='Tour'), columns=drivers[present])
+    # Tours au-delà de la distance de la course
+    return df.dropna(how='all')
+
+def replay_figure(positions_df, driver_names=None):
+    # Graphique des positions réelles, un tracé par pilote
+    driver_names = driver_names or {}
+    names = [driver_names.get(driver_id, str(driver_id)) for driver_id in positions_df.columns]
+    return position_figure(positions_df.index.to_numpy(), positions_df.to_numpy(dtype=float), names,
+                           "Déroulement réel de la course, tour par tour", "Tour")
@@ -0,0 +1,97 @@
+"""Simulation de saisons complètes : championnats pilotes et constructeurs sur tout le calendrier.
+
+Les saisons sont découpées en blocs de taille fixe, chacun avec son propre flux aléatoire issu de
+np.random.SeedSequence(seed).spawn : le résultat ne dépend donc pas du nombre de processus utilisés.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from f1sim.drivers import as_driver_table
+from f1sim.monte_carlo import VARIABILITY_RANGE, base_scores, count_positions, rank_rows
+from f1sim.spans import traced
+
+# Barème des points des dix premiers
+POINTS_SCALE = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+
+SEASONS_PER_CHUNK = 500
+
+def driver_constructors(temps_par_courses_df, driver_mapping):
+    # Écurie de chaque pilote lors de sa course la plus récente
+    latest = temps_par_courses_df.sort_values('race_id').drop_duplicates('driverid', keep='last')
+    names = latest['driverid'].map(driver_mapping)
+    return dict(zip(names[names.notna()], latest.loc[names.notna(), 'name_constructor'].astype(str)))
+
+def points_table(n_drivers, scale=POINTS_SCALE):
+    points = np.zeros(n_drivers, dtype=np.int64)
+    points[:min(len(scale), n_drivers)] = scale[:n_drivers]
+    return points
+
+def rank_championship(points, wins):
+    # Classement au championnat : points, puis nombre de victoires
+    return rank_rows(-(points * (wins.max(initial=0) + 1) + wins))
+
+def _simulate_chunk(finish_base, points, membership, n_seasons, seed_sequence):
+    # finish_base : (courses, pilotes) ; membership : (pilotes, écuries) en 0/1
+    rng = np.random.default_rng(seed_sequence)
+    n_races, n_drivers = finish_base.shape
+    season_points = np.zeros((n_seasons, n_drivers), dtype=np.int64)
+    season_wins = np.zeros((n_seasons, n_drivers), dtype=np.int64)
+    for race in range(n_races):
+        variability = rng.uniform(*VARIABILITY_RANGE, size=(n_seasons, n_drivers))
+        positions = rank_rows(finish_base[race] * variability)
+        season_points += points[positions]
+        season_wins += positions == 0
+    constructor_points = season_points @ membership
+    constructor_wins = season_wins @ membership
+    return (count_positions(rank_championship(season_points, season_wins)),
+            count_positions(rank_championship(constructor_points, constructor_wins)),
+            season_points.sum(axis=0),
+            constructor_points.sum(axis=0))
+
+def _distribution_table(names, counts, total_points, n_seasons, index_name):
+    positions = np.arange(1, counts.shape[1] + 1)
+    table = pd.DataFrame(counts / n_seasons, index=pd.Index(names, name=index_name),
+                         columns=[f"P{i}" for i in positions])
+    table.insert(0, 'Points moyens', total_points / n_seasons)
+    table.insert(0, 'Position moyenne', counts @ positions / n_seasons)
+    table.insert(0, 'Titre', counts[:, 0] / n_seasons)
+    return table.sort_values('Position moyenne')
+
+@traced()
+def simulate_seasons(race_data, constructors, influence_factors, n_seasons, seed=None, max_workers=None,
+                     seasons_per_chunk=SEASONS_PER_CHUNK):
+    # race_data : DriverTable, ou DataFrame 'Nom du pilote', 'Rating', 'Average_start', 'Average_finish'
+    # constructors : écurie de chaque pilote, dans l'ordre de race_data
+    # influence_factors : facteur météo de chaque course du calendrier
+    start = time.perf_counter()
+    drivers = as_driver_table(race_data)
+    # Facteurs de toutes les courses en une fois : tableau (courses, pilotes)
+    finish_base = base_scores(drivers, np.asarray(influence_factors, dtype=float)[:, None])[1]
+    n_drivers = finish_base.shape[1]
+    team_names = list(dict.fromkeys(constructors))
+    membership = np.zeros((n_drivers, len(team_names)), dtype=np.int64)
+    membership[np.arange(n_drivers), [team_names.index(team) for team in constructors]] = 1
+    points = points_table(n_drivers)
+
+    chunk_sizes = [min(seasons_per_chunk, n_seasons - offset) for offset in range(0, n_seasons, seasons_per_chunk)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [(finish_base, points, membership, size, sequence) for size, sequence in zip(chunk_sizes, seed_sequences)]
+    if max_workers == 1 or len(tasks) == 1:
+        results = [_simulate_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_chunk, *zip(*tasks)))
+
+    driver_counts, team_counts, driver_points, team_points = (sum(parts) for parts in zip(*results))
+    elapsed = time.perf_counter() - start
+    return {
+        'drivers': _distribution_table(drivers.names.tolist(), driver_counts, driver_points, n_seasons,
+                                       'Nom du pilote'),
+        'constructors': _distribution_table(team_names, team_counts, team_points, n_seasons, 'Écurie'),
+        'n_seasons': n_seasons,
+        'seconds': elapsed,
+        'seasons_per_second': n_seasons / elapsed if elapsed > 0 else float('inf'),
+    }
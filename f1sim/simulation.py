@@ -0,0 +1,76 @@
+"""Simulations sans interface, appelables depuis un script, un traitement par lots ou la ligne de commande.
+
+Rien n'est lu ni affiché à l'import : les tables sont chargées au premier appel depuis le répertoire de données
+(voir f1sim.paths) et restent ensuite en cache.
+"""
+import numpy as np
+import pandas as pd
+
+from f1sim.calendar import CIRCUIT_RACE_IDS, DEFAULT_WEATHER, WEATHER_FORECASTS
+from f1sim.drivers import CURRENT_DRIVERS, load_driver_table
+from f1sim.lap_simulation import simulate_race_laps
+from f1sim.loader import load_temps_par_courses
+from f1sim.monte_carlo import simulate_race_batch
+from f1sim.paths import data_path
+from f1sim.race_index import load_race_index
+from f1sim.season import driver_constructors, simulate_seasons
+from f1sim.weather import condition_factors, race_weather, weather_factor
+
+# race : positions de départ et d'arrivée par course ; laps : course tour par tour ; season : championnat complet
+MODES = ('race', 'laps', 'season')
+
+def race_data(data_dir=None):
+    # Notes et moyennes des pilotes actuels (DriverTable)
+    return load_driver_table(data_path('temps_par_courses.csv', data_dir)).select(CURRENT_DRIVERS)
+
+def circuit_weather(circuit, data_dir=None):
+    # Relevés des stations les plus proches du circuit (race_weather.csv) en priorité ; la prévision saisie à la main
+    # ne sert que pour une course sans relevé (table absente ou aucune station à portée)
+    observed = race_weather(data_path('race_weather.csv', data_dir), CIRCUIT_RACE_IDS.get(circuit))
+    return observed or WEATHER_FORECASTS.get(circuit, DEFAULT_WEATHER)
+
+def _check_circuits(circuits):
+    circuits = list(CIRCUIT_RACE_IDS) if not circuits else list(circuits)
+    unknown = [circuit for circuit in circuits if circuit not in CIRCUIT_RACE_IDS]
+    if unknown:
+        raise ValueError(f"Circuit(s) inconnu(s) : {', '.join(unknown)}")
+    return circuits
+
+def _circuit_seed(seed, race_id):
+    # Un flux par circuit, dérivé de la graine et de la course : le résultat d'un circuit ne dépend pas des autres
+    return None if seed is None else np.random.SeedSequence([seed, race_id])
+
+def simulate_circuits(circuits=None, n_runs=10_000, seed=None, mode='race', data_dir=None, max_workers=None):
+    # Retourne une table plate (une ligne par pilote, et par circuit hors mode season), prête à être écrite
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {', '.join(MODES)})")
+    circuits = _check_circuits(circuits)
+    drivers = race_data(data_dir)
+    weather = {circuit: circuit_weather(circuit, data_dir) for circuit in circuits}
+
+    if mode == 'season':
+        temps_df = load_temps_par_courses(data_path('temps_par_courses.csv', data_dir))
+        teams = driver_constructors(temps_df, drivers.name_mapping())
+        factors = condition_factors([weather[circuit]['condition'] for circuit in circuits])
+        season = simulate_seasons(drivers, [teams.get(pilote, "Inconnue") for pilote in drivers.names], factors,
+                                  n_runs, seed, max_workers)
+        return season['drivers'].reset_index()
+
+    tables = []
+    for circuit in circuits:
+        race_id = CIRCUIT_RACE_IDS[circuit]
+        factor = weather_factor(weather[circuit]['condition'])
+        if mode == 'race':
+            result = simulate_race_batch(drivers, factor, n_runs, _circuit_seed(seed, race_id))
+        else:
+            path = data_path('temps_par_courses.csv', data_dir)
+            result = simulate_race_laps(load_temps_par_courses(path), race_id, drivers.driver_ids.tolist(),
+                                        drivers.name_mapping(), factor, n_runs, _circuit_seed(seed, race_id),
+                                        race_results=load_race_index(path).race(race_id))
+        table = result['summary'].reset_index()
+        table.insert(0, 'Circuit', circuit)
+        table.insert(1, 'race_id', race_id)
+        table.insert(2, 'Condition', weather[circuit]['condition'])
+        table.insert(3, 'Facteur météo', factor)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
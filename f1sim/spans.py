@@ -0,0 +1,156 @@
+"""Mesure légère du temps passé dans chaque étape : chargement, fusions, simulation, graphiques.
+
+Désactivée par défaut : span() retourne alors un contexte vide partagé et les fonctions décorées par traced()
+ne font qu'un test de plus. Activation par la variable d'environnement F1SIM_SPANS=1 (ou enable()) ;
+F1SIM_SPANS_MEMORY=1 ajoute l'écart de mémoire allouée de chaque étape (tracemalloc, nettement plus coûteux).
+Chaque étape terminée est ajoutée en JSON, une ligne par étape, au fichier F1SIM_SPANS_LOG (f1sim_spans.jsonl).
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+ENABLE_ENV = 'F1SIM_SPANS'
+MEMORY_ENV = 'F1SIM_SPANS_MEMORY'
+LOG_ENV = 'F1SIM_SPANS_LOG'
+DEFAULT_LOG = 'f1sim_spans.jsonl'
+
+_settings = {
+    'enabled': os.environ.get(ENABLE_ENV, '') not in ('', '0'),
+    'memory': os.environ.get(MEMORY_ENV, '') not in ('', '0'),
+    'log_path': os.environ.get(LOG_ENV, DEFAULT_LOG),
+}
+# Étapes de l'exécution en cours, par thread (Streamlit exécute chaque session dans son propre thread)
+_local = threading.local()
+_log_lock = threading.Lock()
+_NULL_SPAN = contextlib.nullcontext()
+
+def enable(memory=False, log_path=None):
+    _settings['enabled'] = True
+    _settings['memory'] = memory
+    if log_path is not None:
+        _settings['log_path'] = log_path
+
+def disable():
+    _settings['enabled'] = False
+
+def is_enabled():
+    return _settings['enabled']
+
+def _records():
+    if not hasattr(_local, 'records'):
+        _local.records = []
+        _local.depth = 0
+    return _local.records
+
+def _write_log(record):
+    if not _settings['log_path']:
+        return
+    with _log_lock, open(_settings['log_path'], 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+class _Span:
+    __slots__ = ('name', 'attributes', 'start', 'memory_start', 'depth')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        _records()
+        self.depth = _local.depth
+        _local.depth += 1
+        self.memory_start = None
+        if _settings['memory']:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _local.depth -= 1
+        record = {'name': self.name, 'seconds': seconds, 'depth': self.depth, 'started': self.start,
+                  'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pid': os.getpid(),
+                  'thread': threading.current_thread().name}
+        if self.memory_start is not None:
+            record['memory_mb'] = (tracemalloc.get_traced_memory()[0] - self.memory_start) / 1024 ** 2
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(self.attributes)
+        _local.records.append(record)
+        _write_log(record)
+        return False
+
+def span(name, **attributes):
+    # with span('fusions', table='results'): ...
+    if not _settings['enabled']:
+        return _NULL_SPAN
+    return _Span(name, attributes)
+
+def traced(name=None):
+    # Décorateur : une étape par appel, nommée d'après la fonction par défaut
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _settings['enabled']:
+                return function(*args, **kwargs)
+            with _Span(label, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_span(name, seconds, started, **attributes):
+    # Étape mesurée dans un autre thread (chargement parallèle), rattachée à l'exécution du thread courant
+    if not _settings['enabled']:
+        return
+    _records()
+    record = {'name': name, 'seconds': seconds, 'depth': _local.depth, 'started': started,
+              'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pid': os.getpid(),
+              'thread': threading.current_thread().name}
+    record.update(attributes)
+    _local.records.append(record)
+    _write_log(record)
+
+def reset():
+    # À appeler au début de chaque exécution du script Streamlit
+    _records().clear()
+    _local.depth = 0
+
+def recorded_spans():
+    return list(_records())
+
+def spans_table(records=None):
+    import pandas as pd
+
+    records = recorded_spans() if records is None else records
+    table = pd.DataFrame(records)
+    if table.empty:
+        return table
+    # Étapes dans l'ordre de début, les étapes imbriquées marquées sous leur parent
+    table = table.sort_values('started', kind='stable')
+    table['Étape'] = ['· ' * depth + name for depth, name in zip(table['depth'], table['name'])]
+    table['Durée (ms)'] = table['seconds'] * 1000
+    columns = ['Étape', 'Durée (ms)'] + (['memory_mb'] if 'memory_mb' in table.columns else [])
+    return table[columns].rename(columns={'memory_mb': 'Mémoire (Mo)'})
+
+def show_panel():
+    # Panneau repliable dans la barre latérale ; rien n'est affiché si la mesure est désactivée
+    if not _settings['enabled']:
+        return
+    import streamlit as st
+
+    records = recorded_spans()
+    with st.sidebar.expander("Temps par étape", expanded=False):
+        if not records:
+            st.write("Aucune étape mesurée pendant cette exécution.")
+            return
+        total = sum(record['seconds'] for record in records if record['depth'] == 0)
+        st.dataframe(spans_table(records).round(2), hide_index=True)
+        st.caption(f"Total des étapes de premier niveau : {total * 1000:.1f} ms")
@@ -0,0 +1,77 @@
+"""Rapport du temps de démarrage : durée d'import de chaque module et durée de chargement de chaque table.
+
+Utilisation : python -m f1sim.startup --data-dir DOSSIER [modules ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules importés par les applications, du plus léger au plus lourd
+APP_MODULES = ['numpy', 'pandas', 'streamlit', 'plotly.graph_objects', 'plotly.express', 'PIL', 'sklearn.neighbors',
+               'pyarrow', 'f1sim.loader']
+
+# Tables lues par les applications (projet.py et simulateurs)
+APP_TABLES = ['temps_par_courses.csv', 'cleaned_races.csv', 'cleaned_results.csv', 'cleaned_seasons.csv',
+              'cleaned_constructors.csv', 'cleaned_drivers.csv', 'cleaned_qualifying.csv', 'weather_meteo.csv',
+              'cleaned_circuits.csv']
+
+def measure_import(module):
+    # Import à froid dans un processus neuf ; retourne la durée cumulée en secondes (None si le module est absent)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                               capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if completed.returncode != 0:
+        return None
+    for line in completed.stderr.splitlines():
+        # Format : "import time:  self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    return None
+
+def measure_loads(data_dir, tables=APP_TABLES, max_workers=None):
+    # Chargement à froid des tables présentes, en parallèle et via le même chemin que les applications ;
+    # durée de chaque table et durée totale ('total')
+    from f1sim import loader
+    prepares = {'temps_par_courses.csv': loader.prepare_temps_par_courses, 'weather_meteo.csv': loader.prepare_weather,
+                'cleaned_circuits.csv': loader.prepare_circuits}
+    loader.clear_cache()
+    loader.load_timings.clear()
+    requests = []
+    for table in tables:
+        path = os.path.join(data_dir, table)
+        if os.path.exists(path) or os.path.exists(os.path.splitext(path)[0] + '.parquet'):
+            requests.append((path, prepares.get(table)))
+    _, timings = loader.load_tables(requests, max_workers)
+    return timings
+
+def startup_report(data_dir='.', modules=APP_MODULES, tables=APP_TABLES, max_workers=None):
+    rows = []
+    for module in modules:
+        rows.append(('import', module, measure_import(module)))
+    timings = measure_loads(data_dir, tables, max_workers)
+    total = timings.pop('total')
+    for table, seconds in timings.items():
+        rows.append(('table', table, seconds))
+    # Tables lues en parallèle : le chargement dure autant que la plus lente, pas la somme des tables
+    rows.append(('chargement', 'toutes les tables', total))
+    return rows
+
+def format_report(rows):
+    lines = [f"{'étape':<12}{'nom':<52}{'durée (ms)':>12}"]
+    for kind, name, seconds in rows:
+        duration = f"{seconds * 1000:.1f}" if seconds is not None else "absent"
+        lines.append(f"{kind:<12}{name:<52}{duration:>12}")
+    # Les tables sont comptées par leur chargement commun ; les imports s'additionnent
+    total = sum(seconds for kind, _, seconds in rows if seconds is not None and kind != 'table')
+    lines.append(f"{'total':<64}{total * 1000:>12.1f}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'import et de chargement au démarrage des applications.")
+    parser.add_argument('modules', nargs='*', default=APP_MODULES)
+    parser.add_argument('--data-dir', default='.')
+    parser.add_argument('--workers', type=int, default=None, help="Threads de chargement (par défaut : une par table)")
+    args = parser.parse_args()
+    print(format_report(startup_report(args.data_dir, args.modules, max_workers=args.workers)))
@@ -0,0 +1,140 @@
+"""Instantanés colonnaires (Parquet) des tables nettoyées, avec des types compacts, et lecture des tables CSV."""
+import csv
+import importlib.util
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# Types compacts appliqués aux colonnes connues (les autres colonnes sont laissées telles quelles)
+INT16_COLUMNS = ['lap', 'grid', 'position', 'positionorder', 'laps', 'number', 'round', 'rank', 'fastestlap', 'year']
+INT32_COLUMNS = ['milliseconds', 'time', 'raceid', 'race_id', 'driverid', 'constructorid', 'resultid', 'statusid',
+                 'circuitid', 'qualifyid']
+CATEGORY_COLUMNS = ['driver_forename', 'driver_surname', 'forename', 'surname', 'name_constructor', 'status',
+                    'nationality', 'code']
+
+# Marqueurs de valeur manquante utilisés par Ergast
+NA_VALUES = ['\\N']
+
+SNAPSHOT_SUFFIX = '.parquet'
+
+def snapshot_supported():
+    # pyarrow installé (sans l'importer : find_spec ne charge pas le module)
+    return importlib.util.find_spec('pyarrow') is not None
+
+def snapshot_path(csv_path):
+    return Path(csv_path).with_suffix(SNAPSHOT_SUFFIX)
+
+def _to_integer(series, dtype):
+    values = pd.to_numeric(series.replace(NA_VALUES, pd.NA), errors='coerce')
+    # Une colonne qui contient du texte (ex. 'time' au format '1:33:56.736') n'est pas convertie
+    if values.isna().sum() > series.isin(NA_VALUES).sum() + series.isna().sum():
+        return series
+    if values.notna().all():
+        return values.astype(dtype)
+    return values.astype(dtype.capitalize())
+
+def to_compact_dtypes(df):
+    # Conversion en int16 / int32 / category ; ne modifie pas le DataFrame d'origine
+    df = df.copy()
+    for col in df.columns:
+        key = col.lower()
+        if key in INT16_COLUMNS:
+            df[col] = _to_integer(df[col], 'int16')
+        elif key in INT32_COLUMNS:
+            df[col] = _to_integer(df[col], 'int32')
+        elif key in CATEGORY_COLUMNS:
+            df[col] = df[col].astype('category')
+    return df
+
+def write_snapshot(df, csv_path):
+    # Écrit l'instantané Parquet à côté du CSV ; retourne son chemin (None si pyarrow est absent)
+    if not snapshot_supported():
+        return None
+    path = snapshot_path(csv_path)
+    to_compact_dtypes(df).to_parquet(path, index=False)
+    return path
+
+def snapshot_csv(csv_path):
+    return write_snapshot(pd.read_csv(csv_path), csv_path)
+
+# Colonnes et types des tables Ergast lues par les applications (noms en minuscules, comme dans les tables nettoyées).
+# Les colonnes qui peuvent contenir \N restent du texte, comme les lirait le moteur C par inférence ; les autres
+# colonnes d'un fichier ne sont pas lues.
+_ERGAST_SCHEMAS = {
+    'races': {'raceid': 'int64', 'year': 'int64', 'round': 'int64', 'circuitid': 'int64', 'name': 'str', 'date': 'str',
+              'time': 'str', 'url': 'str', 'fp1_date': 'str', 'fp1_time': 'str', 'fp2_date': 'str', 'fp2_time': 'str',
+              'fp3_date': 'str', 'fp3_time': 'str', 'quali_date': 'str', 'quali_time': 'str', 'sprint_date': 'str',
+              'sprint_time': 'str'},
+    'results': {'resultid': 'int64', 'raceid': 'int64', 'driverid': 'int64', 'constructorid': 'int64', 'number': 'str',
+                'grid': 'int64', 'position': 'str', 'positiontext': 'str', 'positionorder': 'int64',
+                'points': 'float64', 'laps': 'int64', 'time': 'str', 'milliseconds': 'str', 'fastestlap': 'str', 'rank': 'str',
+                'fastestlaptime': 'str', 'fastestlapspeed': 'str', 'statusid': 'int64'},
+    'seasons': {'year': 'int64', 'url': 'str'},
+    'constructors': {'constructorid': 'int64', 'constructorref': 'str', 'name': 'str', 'nationality': 'str',
+                     'url': 'str'},
+    'drivers': {'driverid': 'int64', 'driverref': 'str', 'number': 'str', 'code': 'str', 'forename': 'str',
+                'surname': 'str', 'dob': 'str', 'nationality': 'str', 'url': 'str'},
+    'qualifying': {'qualifyid': 'int64', 'raceid': 'int64', 'driverid': 'int64', 'constructorid': 'int64',
+                   'number': 'int64', 'position': 'int64', 'q1': 'str', 'q2': 'str', 'q3': 'str'},
+    'circuits': {'circuitid': 'int64', 'circuitref': 'str', 'name': 'str', 'location': 'str', 'country': 'str',
+                 'lat': 'str', 'lng': 'str', 'alt': 'str', 'url': 'str'},
+    'lap_times': {'raceid': 'int64', 'driverid': 'int64', 'lap': 'int64', 'position': 'int64', 'time': 'str',
+                  'milliseconds': 'int64'},
+}
+TABLE_SCHEMAS = {**_ERGAST_SCHEMAS, **{f'cleaned_{name}': schema for name, schema in _ERGAST_SCHEMAS.items()}}
+# Temps au tour nettoyés : 'time' converti en millisecondes
+TABLE_SCHEMAS['cleaned_lap_times'] = {'raceid': 'int64', 'driverid': 'int64', 'lap': 'int64', 'time': 'int64'}
+TABLE_SCHEMAS['temps_par_courses'] = {
+    **{('race_id' if column == 'raceid' else column): dtype for column, dtype in _ERGAST_SCHEMAS['results'].items()},
+    'driver_forename': 'str', 'driver_surname': 'str', 'name_constructor': 'str'}
+# Colonnes des relevés variables : seuls les types des colonnes connues sont fixés, toutes les colonnes sont lues
+PARTIAL_SCHEMAS = {'race_weather': {'raceid': 'int64', 'condition': 'str'}}
+
+# Options de read_csv prises en charge par le moteur pyarrow ; avec une autre option, le moteur C est utilisé
+PYARROW_OPTIONS = {'usecols', 'dtype', 'na_values', 'sep', 'header', 'names', 'encoding'}
+
+def csv_engine(read_csv_kwargs=None):
+    # Moteur le plus rapide disponible : pyarrow (lecture multithread), sinon le moteur C
+    if snapshot_supported() and set(read_csv_kwargs or ()) <= PYARROW_OPTIONS:
+        return 'pyarrow'
+    return 'c'
+
+def _header(csv_path):
+    with open(csv_path, encoding='utf-8-sig') as f:
+        return next(csv.reader([f.readline()]), [])
+
+def schema_options(csv_path):
+    # usecols et dtype de read_csv pour une table connue (noms de colonnes du fichier, quelle que soit leur casse)
+    name = Path(csv_path).stem
+    schema = TABLE_SCHEMAS.get(name)
+    partial = PARTIAL_SCHEMAS.get(name)
+    if schema is None and partial is None:
+        return {}
+    columns = _header(csv_path)
+    types = schema or partial
+    dtype = {column: types[column.lower()] for column in columns if column.lower() in types}
+    if schema is None:
+        return {'dtype': dtype}
+    return {'usecols': [column for column in columns if column.lower() in schema], 'dtype': dtype}
+
+def read_csv_table(csv_path, **read_csv_kwargs):
+    # Colonnes et types explicites pour les tables connues (sauf s'ils sont passés par l'appelant), moteur pyarrow
+    # si possible ; un fichier qui ne respecte pas les types attendus est relu avec inférence des types
+    options = {} if {'usecols', 'dtype'} & set(read_csv_kwargs) else schema_options(csv_path)
+    kwargs = {**options, **read_csv_kwargs}
+    try:
+        return pd.read_csv(csv_path, engine=csv_engine(kwargs), **kwargs)
+    except (ValueError, TypeError):
+        if not options:
+            raise
+        return pd.read_csv(csv_path, usecols=options.get('usecols'), **read_csv_kwargs)
+
+def read_table(csv_path, **read_csv_kwargs):
+    # Lit l'instantané s'il existe et n'est pas plus ancien que le CSV, sinon retombe sur le CSV
+    path = snapshot_path(csv_path)
+    if path.exists() and snapshot_supported():
+        if not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path):
+            columns = read_csv_kwargs.get('usecols')
+            return pd.read_parquet(path, columns=columns)
+    return read_csv_table(csv_path, **read_csv_kwargs)
@@ -0,0 +1,161 @@
+"""Jeux de données synthétiques au schéma Ergast, pour les mesures de performance.
+
+L'échelle 1 correspond à la taille de temps_par_courses.csv (34 courses de 20 pilotes) ; l'échelle k multiplie le
+nombre de courses par k. Les temps au tour sont générés et écrits par blocs de courses : la mémoire utilisée ne
+dépend pas de l'échelle.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from f1sim.drivers import CURRENT_DRIVERS, GENERAL_RATINGS
+from f1sim.season import POINTS_SCALE
+
+RACES_PER_SCALE = 34
+RACES_PER_SEASON = 24
+LAST_SEASON = 2024
+LAPS_PER_RACE = 57
+BASE_LAP_MS = 92_000
+# Courses générées ensemble lors de l'écriture des temps au tour
+RACES_PER_BLOCK = 200
+
+CONSTRUCTORS = {9: 'Red Bull', 6: 'Ferrari', 131: 'Mercedes', 1: 'McLaren', 117: 'Aston Martin', 214: 'Alpine',
+                3: 'Williams', 215: 'RB', 15: 'Sauber', 210: 'Haas'}
+
+def _format_lap_time(milliseconds):
+    # m:ss.mmm, comme dans lap_times.csv
+    ms = pd.Series(milliseconds)
+    return ((ms // 60_000).astype(str) + ':' + (ms // 1000 % 60).astype(str).str.zfill(2) + '.'
+            + (ms % 1000).astype(str).str.zfill(3))
+
+def _format_race_time(milliseconds, is_winner, gap):
+    # Vainqueur en h:mm:ss.mmm, les autres en écart (+s.mmm), comme dans results.csv
+    ms = pd.Series(milliseconds)
+    winner = ((ms // 3_600_000).astype(str) + ':' + (ms // 60_000 % 60).astype(str).str.zfill(2) + ':'
+              + (ms // 1000 % 60).astype(str).str.zfill(2) + '.' + (ms % 1000).astype(str).str.zfill(3))
+    gap = pd.Series(gap)
+    others = '+' + (gap // 1000).astype(str) + '.' + (gap % 1000).astype(str).str.zfill(3)
+    return winner.where(is_winner, others).to_numpy()
+
+def race_calendar(n_races):
+    race_index = np.arange(n_races)
+    year = LAST_SEASON - race_index // RACES_PER_SEASON
+    round_ = race_index % RACES_PER_SEASON + 1
+    date = pd.to_datetime(pd.DataFrame({'year': year, 'month': 3, 'day': 1})) + pd.to_timedelta(round_ * 14, unit='D')
+    return pd.DataFrame({
+        'raceId': race_index + 1,
+        'year': year,
+        'round': round_,
+        'circuitId': round_,
+        'name': [f"Grand Prix {r}" for r in round_],
+        'date': date.dt.strftime('%Y-%m-%d'),
+    })
+
+def driver_strength():
+    # Écart moyen au tour (ms) de chaque pilote, déduit de sa note
+    ratings = np.array([GENERAL_RATINGS[driver_id] for driver_id in CURRENT_DRIVERS], dtype=float)
+    return (ratings.max() - ratings) * 60.0
+
+def race_results(races, rng):
+    n_races, n_drivers = len(races), len(CURRENT_DRIVERS)
+    strength = driver_strength()
+    # Rythme de course de chaque pilote : force + aléa ; l'ordre d'arrivée et la grille en découlent
+    pace = strength + rng.normal(0, 250, size=(n_races, n_drivers))
+    order = np.argsort(pace, axis=1)
+    grid_order = np.argsort(strength + rng.normal(0, 250, size=(n_races, n_drivers)), axis=1)
+    position = np.empty_like(order)
+    np.put_along_axis(position, order, np.arange(1, n_drivers + 1)[None, :], axis=1)
+    grid = np.empty_like(grid_order)
+    np.put_along_axis(grid, grid_order, np.arange(1, n_drivers + 1)[None, :], axis=1)
+
+    total_ms = ((BASE_LAP_MS + pace) * LAPS_PER_RACE).astype(np.int64)
+    gap = total_ms - total_ms.min(axis=1, keepdims=True)
+    points = np.zeros(n_drivers + 1, dtype=np.int64)
+    points[1:len(POINTS_SCALE) + 1] = POINTS_SCALE
+    fastest = (BASE_LAP_MS + pace - 1_500 + rng.normal(0, 200, size=pace.shape)).astype(np.int64)
+    constructor_ids = np.array(list(CONSTRUCTORS))[np.arange(n_drivers) // 2]
+
+    flat_position = position.ravel()
+    df = pd.DataFrame({
+        'resultId': np.arange(1, n_races * n_drivers + 1),
+        'raceId': np.repeat(races['raceId'].to_numpy(), n_drivers),
+        'driverId': np.tile(CURRENT_DRIVERS, n_races),
+        'constructorId': np.tile(constructor_ids, n_races),
+        'number': np.tile(np.arange(1, n_drivers + 1), n_races),
+        'grid': grid.ravel(),
+        'position': flat_position,
+        'positionText': flat_position.astype(str),
+        'positionOrder': flat_position,
+        'points': points[flat_position],
+        'laps': LAPS_PER_RACE,
+        'time': _format_race_time(total_ms.ravel(), flat_position == 1, gap.ravel()),
+        'milliseconds': total_ms.ravel(),
+        'fastestLap': rng.integers(10, LAPS_PER_RACE + 1, size=n_races * n_drivers),
+        'rank': np.argsort(np.argsort(fastest, axis=1), axis=1).ravel() + 1,
+        'fastestLapTime': _format_lap_time(fastest.ravel()).to_numpy(),
+        # Circuit de 5,4 km : vitesse moyenne du meilleur tour en km/h
+        'fastestLapSpeed': np.round(5.4 * 3_600_000 / fastest.ravel(), 3),
+        'statusId': 1,
+    })
+    return df
+
+def lap_times_block(results, rng):
+    # Temps au tour de toutes les courses de results : (courses, pilotes, tours) aplati dans l'ordre Ergast
+    n_drivers = len(CURRENT_DRIVERS)
+    race_ids = results['raceId'].to_numpy()[::n_drivers]
+    n_races = len(race_ids)
+    offset = (results['milliseconds'].to_numpy().reshape(n_races, n_drivers) / LAPS_PER_RACE - BASE_LAP_MS)
+    laps = (BASE_LAP_MS + offset[:, :, None] + rng.normal(0, 400, size=(n_races, n_drivers, LAPS_PER_RACE)))
+    laps = laps.astype(np.int64)
+    cumulative = laps.cumsum(axis=2)
+    # Position au tour : rang du temps cumulé parmi les pilotes
+    position = np.argsort(np.argsort(cumulative, axis=1), axis=1) + 1
+    return pd.DataFrame({
+        'raceId': np.repeat(race_ids, n_drivers * LAPS_PER_RACE),
+        'driverId': np.tile(np.repeat(CURRENT_DRIVERS, LAPS_PER_RACE), n_races),
+        'lap': np.tile(np.arange(1, LAPS_PER_RACE + 1), n_races * n_drivers),
+        'position': position.ravel(),
+        'time': _format_lap_time(laps.ravel()).to_numpy(),
+        'milliseconds': laps.ravel(),
+    })
+
+def temps_par_courses_table(results, races, drivers, constructors):
+    # Même schéma que temps_par_courses.csv (résultats, noms des pilotes et des constructeurs), toutes saisons
+    df = results.merge(drivers, on='driverId').merge(constructors, on='constructorId')
+    df = df.rename(columns={'forename': 'driver_forename', 'surname': 'driver_surname', 'name': 'name_constructor',
+                            'raceId': 'race_id'})
+    df.columns = [column.lower() for column in df.columns]
+    return df.sort_values(['race_id', 'positionorder']).reset_index(drop=True)
+
+def generate_dataset(directory, scale=1, seed=0, lap_times=True):
+    # Écrit les tables Ergast brutes et temps_par_courses.csv ; retourne le nombre de lignes de chaque fichier
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    races = race_calendar(RACES_PER_SCALE * scale)
+    results = race_results(races, rng)
+    drivers = pd.DataFrame({'driverId': CURRENT_DRIVERS, 'forename': 'Pilote',
+                            'surname': [str(driver_id) for driver_id in CURRENT_DRIVERS]})
+    constructors = pd.DataFrame({'constructorId': list(CONSTRUCTORS), 'name': list(CONSTRUCTORS.values())})
+    seasons = pd.DataFrame({'year': np.sort(races['year'].unique())})
+    seasons['url'] = 'http://en.wikipedia.org/wiki/' + seasons['year'].astype(str) + '_Formula_One_World_Championship'
+    circuits = pd.DataFrame({'circuitId': np.arange(1, RACES_PER_SEASON + 1),
+                             'name': [f"Circuit {i}" for i in range(1, RACES_PER_SEASON + 1)],
+                             'lat': rng.uniform(-40, 55, RACES_PER_SEASON).round(4),
+                             'lng': rng.uniform(-120, 150, RACES_PER_SEASON).round(4)})
+    tables = {'races.csv': races, 'results.csv': results, 'drivers.csv': drivers, 'constructors.csv': constructors,
+              'seasons.csv': seasons, 'circuits.csv': circuits,
+              'temps_par_courses.csv': temps_par_courses_table(results, races, drivers, constructors)}
+    counts = {}
+    for name, df in tables.items():
+        df.to_csv(os.path.join(directory, name), index=False)
+        counts[name] = len(df)
+    if lap_times:
+        path = os.path.join(directory, 'lap_times.csv')
+        block_rows = RACES_PER_BLOCK * len(CURRENT_DRIVERS)
+        counts['lap_times.csv'] = 0
+        for start in range(0, len(results), block_rows):
+            block = lap_times_block(results.iloc[start:start + block_rows], rng)
+            block.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+            counts['lap_times.csv'] += len(block)
+    return counts
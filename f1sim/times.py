@@ -0,0 +1,14 @@
+"""Conversion vectorisée des temps Ergast en millisecondes."""
+import pandas as pd
+
+# Formats acceptés : 'm:ss.mmm' (tour), 'h:mm:ss.mmm' (course) et '+ss.mmm' / '+m:ss.mmm' (écart)
+TIME_PATTERN = r'^(?P<gap>\+)?(?:(?:(?P<hours>\d+):)?(?P<minutes>\d{1,2}):)?(?P<seconds>\d{1,2}\.\d{1,4})$'
+
+def parse_time_column(times):
+    # Conversion vectorisée d'une colonne de temps en millisecondes (NA pour les valeurs invalides)
+    parts = times.astype('string').str.strip().str.extract(TIME_PATTERN)
+    hours = pd.to_numeric(parts['hours']).fillna(0)
+    minutes = pd.to_numeric(parts['minutes']).fillna(0)
+    seconds = pd.to_numeric(parts['seconds'])
+    milliseconds = (hours * 3600000 + minutes * 60000 + seconds * 1000).round()
+    return milliseconds.astype('Int64')
@@ -0,0 +1,177 @@
+"""Météo de chaque course à partir des relevés de weather_meteo.csv.
+
+Les stations (coordonnées distinctes des relevés) sont indexées une fois dans un BallTree (distance haversine) ;
+tous les circuits sont interrogés en une seule requête. Pour chaque course, le relevé le plus proche de la date
+de la course est ensuite pris dans chaque station voisine (merge_asof avec une fenêtre de tolérance), puis les
+relevés sont combinés en une table de caractéristiques par course, calculée une fois par le pipeline de nettoyage.
+
+Les libellés de conditions (« Très nuageux avec averses »...) sont ramenés à un petit vocabulaire catégoriel, associé
+à une table de facteurs d'influence : chaque libellé distinct n'est analysé qu'une fois.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from f1sim.loader import load_table
+
+EARTH_RADIUS_KM = 6371.0
+# Stations voisines retenues pour chaque circuit, et distance au-delà de laquelle une station est ignorée
+N_NEIGHBORS = 3
+MAX_DISTANCE_KM = 150.0
+# Écart maximal entre la date de la course et celle du relevé
+WEATHER_WINDOW = pd.Timedelta(days=3)
+# Colonnes de date possibles dans les relevés, par ordre de préférence
+TIME_COLUMNS = ['fact_time', 'fact_date', 'date', 'time', 'datetime']
+CONDITION_COLUMNS = ['fact_condition', 'condition']
+# Au-delà de ce cumul de précipitations (mm), la course est considérée sous la pluie
+RAIN_THRESHOLD_MM = 0.5
+
+# Vocabulaire des conditions et facteur d'influence de chacune
+WEATHER_FACTORS = {'pluie': 1.5, 'nuageux': 1.3, 'clair': 1.0, 'autre': 1.05}
+# Mots-clés de chaque catégorie, de la plus pénalisante à la moins pénalisante :
+# un libellé qui en cite plusieurs prend la plus pénalisante (« Ciel peu nuageux devenant clair » -> nuageux)
+CONDITION_KEYWORDS = {
+    'pluie': ('averse', 'pluie'),
+    'nuageux': ('nuageux', 'instable'),
+    'clair': ('ciel clair', 'beau temps'),
+}
+CONDITION_DTYPE = pd.CategoricalDtype(list(WEATHER_FACTORS))
+_FACTOR_TABLE = np.array(list(WEATHER_FACTORS.values()))
+
+def _first_column(df, candidates):
+    return next((column for column in candidates if column in df.columns), None)
+
+def _to_datetime(values):
+    dates = pd.to_datetime(values, errors='coerce', utc=True)
+    return dates.dt.tz_localize(None)
+
+def _find_column(columns, keyword):
+    return next((column for column in columns if keyword in column.lower()), None)
+
+def station_table(weather_df):
+    # Une ligne par station, numérotée dans l'ordre d'apparition
+    return (weather_df[['fact_latitude', 'fact_longitude']].dropna().drop_duplicates()
+            .reset_index(drop=True).rename_axis('station').reset_index())
+
+def nearest_stations(stations, circuits_df, n_neighbors=N_NEIGHBORS, max_distance_km=MAX_DISTANCE_KM):
+    # Import au premier besoin : scikit-learn n'est chargé que si la météo des courses est recalculée
+    from sklearn.neighbors import NearestNeighbors
+
+    circuits = circuits_df[['circuitid', 'lat', 'lng']].dropna()
+    n_neighbors = min(n_neighbors, len(stations))
+    if circuits.empty or n_neighbors == 0:
+        return pd.DataFrame({'circuitid': [], 'station': [], 'distance_km': []})
+    index = NearestNeighbors(n_neighbors=n_neighbors, algorithm='ball_tree', metric='haversine')
+    index.fit(np.radians(stations[['fact_latitude', 'fact_longitude']].to_numpy()))
+    distances, neighbors = index.kneighbors(np.radians(circuits[['lat', 'lng']].to_numpy()))
+    pairs = pd.DataFrame({
+        'circuitid': np.repeat(circuits['circuitid'].to_numpy(), n_neighbors),
+        'station': stations['station'].to_numpy()[neighbors.ravel()],
+        'distance_km': distances.ravel() * EARTH_RADIUS_KM,
+    })
+    return pairs[pairs['distance_km'] <= max_distance_km].reset_index(drop=True)
+
+def _weighted_mean(df, columns, weights):
+    weighted = df[columns].mul(weights, axis=0)
+    # Les relevés manquants ne comptent ni au numérateur ni au dénominateur
+    totals = df[columns].notna().mul(weights, axis=0)
+    return weighted.groupby(df['raceid']).sum(min_count=1) / totals.groupby(df['raceid']).sum()
+
+def race_weather_features(weather_df, circuits_df, races_df, n_neighbors=N_NEIGHBORS,
+                          max_distance_km=MAX_DISTANCE_KM, window=WEATHER_WINDOW):
+    stations = station_table(weather_df)
+    weather = weather_df.merge(stations, on=['fact_latitude', 'fact_longitude'])
+    pairs = nearest_stations(stations, circuits_df, n_neighbors, max_distance_km)
+    races = races_df[['raceid', 'circuitid', 'date']].copy()
+    races['date'] = _to_datetime(races['date'])
+    pairs = races.dropna(subset=['date']).merge(pairs, on='circuitid')
+
+    features = [column for column in weather.columns
+                if column.startswith('fact_') and column not in ('fact_latitude', 'fact_longitude')
+                and pd.api.types.is_numeric_dtype(weather[column])]
+    condition_column = _first_column(weather, CONDITION_COLUMNS)
+    time_column = _first_column(weather, TIME_COLUMNS)
+    keep = ['station'] + features + ([condition_column] if condition_column else [])
+    if time_column is not None:
+        # Relevé le plus proche de la date de course dans chaque station voisine, à la fenêtre près
+        weather['observed_at'] = _to_datetime(weather[time_column])
+        weather = weather.dropna(subset=['observed_at']).sort_values('observed_at')
+        matched = pd.merge_asof(pairs.sort_values('date'), weather[keep + ['observed_at']],
+                                left_on='date', right_on='observed_at', by='station',
+                                tolerance=window, direction='nearest')
+        matched = matched.dropna(subset=['observed_at'])
+    else:
+        # Relevés sans date : moyenne de chaque station
+        summary = weather.groupby('station')[features].mean()
+        if condition_column:
+            summary[condition_column] = weather.groupby('station')[condition_column].first()
+        matched = pairs.merge(summary.reset_index(), on='station')
+
+    # Les stations proches pèsent davantage (pondération par l'inverse de la distance)
+    weights = 1.0 / (matched['distance_km'] + 1.0)
+    table = _weighted_mean(matched, features, weights) if features else pd.DataFrame(index=matched['raceid'].unique())
+    nearest = matched.sort_values('distance_km').drop_duplicates('raceid').set_index('raceid')
+    table['distance_km'] = nearest['distance_km']
+    table['n_observations'] = matched.groupby('raceid').size()
+    temperature = _find_column(features, 'temp')
+    if temperature is not None:
+        table['temp_min'] = matched.groupby('raceid')[temperature].min()
+        table['temp_max'] = matched.groupby('raceid')[temperature].max()
+    if condition_column:
+        table['condition'] = nearest[condition_column]
+    return table.rename_axis('raceid').reset_index().sort_values('raceid', ignore_index=True)
+
+def describe_race_weather(row):
+    # Ligne de la table par course (avec temp_min et temp_max) -> dictionnaire au format de weather_conditions
+    condition = row.get('condition')
+    if not isinstance(condition, str) or not condition:
+        precipitation = next((row[key] for key in row.index if 'precip' in key or 'rain' in key), np.nan)
+        condition = "Pluie" if precipitation >= RAIN_THRESHOLD_MM else "Ciel clair"
+    return {
+        "condition": condition,
+        "temp_min": round(float(row['temp_min'])),
+        "temp_max": round(float(row['temp_max'])),
+    }
+
+@lru_cache(maxsize=None)
+def classify_condition(label):
+    # Libellé libre -> catégorie du vocabulaire
+    if not isinstance(label, str):
+        return 'autre'
+    label = label.lower()
+    for category, keywords in CONDITION_KEYWORDS.items():
+        if any(keyword in label for keyword in keywords):
+            return category
+    return 'autre'
+
+def normalize_conditions(conditions):
+    # Chaque libellé distinct est classé une fois, puis les catégories sont recopiées par les codes
+    labels = pd.Categorical(conditions)
+    # La dernière entrée sert au code -1 (libellé manquant)
+    categories = [classify_condition(label) for label in labels.categories] + ['autre']
+    codes = np.array([CONDITION_DTYPE.categories.get_loc(category) for category in categories])
+    return pd.Categorical.from_codes(codes[labels.codes], dtype=CONDITION_DTYPE)
+
+def condition_factors(conditions):
+    # Facteurs d'influence d'un tableau de conditions, en une seule indexation
+    return _FACTOR_TABLE[normalize_conditions(conditions).codes]
+
+def weather_factor(condition):
+    return WEATHER_FACTORS[classify_condition(condition)]
+
+def load_race_weather(path):
+    return load_table(path)
+
+def race_weather(path, race_id):
+    # Météo d'une course, ou None si la table est absente, sans températures ou ne couvre pas la course
+    try:
+        table = load_race_weather(path)
+    except FileNotFoundError:
+        return None
+    if 'temp_min' not in table.columns:
+        return None
+    row = table[table['raceid'] == race_id]
+    if row.empty or pd.isna(row['temp_min'].iloc[0]):
+        return None
+    return describe_race_weather(row.iloc[0])
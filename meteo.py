@@ -1,255 +1,186 @@
-import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
 import streamlit as st
-from PIL import Image
-from sklearn.neighbors import NearestNeighbors
-
-logo_path = 'C:/Users/Marco Luis/Documents/PROJET Data prediction VVA MARCO LUIS/F1-LOGO.png'
-logo = Image.open(logo_path)
-st.image(logo, width=300, caption="Simulation Formule 1")
-
-temps_par_courses_path = 'C:/Users/Marco Luis/Documents/PROJET Data prediction VVA MARCO LUIS/temps_par_courses.csv'
-drivers_path = 'C:/Users/Marco Luis/Documents/PROJET Data prediction VVA MARCO LUIS/drivers.csv'
-qualifying_path = 'C:/Users/Marco Luis/Documents/PROJET Data prediction VVA MARCO LUIS/cleaned_qualifying.csv'
-weather_path = 'C:/Users/Marco Luis/Documents/PROJET Data prediction VVA MARCO LUIS/weather_meteo.csv'
-circuits_path = 'C:/Users/Marco Luis/Documents/PROJET Data prediction VVA MARCO LUIS/cleaned_circuits.csv'
-
-temps_par_courses_df = pd.read_csv(temps_par_courses_path)
-drivers_df = pd.read_csv(drivers_path)
-qualifying_df = pd.read_csv(qualifying_path)
-weather_df = pd.read_csv(weather_path)
-circuits_df = pd.read_csv(circuits_path)
-
-def clean_coordinates(df, lat_col, lng_col):
-    df[lat_col] = df[lat_col].astype(str).str.replace(',', '.').astype(float)
-    df[lng_col] = df[lng_col].astype(str).str.replace(',', '.').astype(float)
-    return df
-
-weather_df = clean_coordinates(weather_df, 'fact_latitude', 'fact_longitude')
-circuits_df = clean_coordinates(circuits_df, 'lat', 'lng')
-
-temps_par_courses_df['milliseconds'] = pd.to_numeric(temps_par_courses_df['milliseconds'], errors='coerce')
-temps_par_courses_df = temps_par_courses_df.dropna(subset=['milliseconds'])
-
-driver_mapping = {
-    830: "Max Verstappen",
-    815: "Sergio Pérez",
-    844: "Charles Leclerc",
-    832: "Carlos Sainz",
-    1: "Lewis Hamilton",
-    847: "George Russell",
-    4: "Fernando Alonso",
-    840: "Lance Stroll",
-    846: "Lando Norris",
-    857: "Oscar Piastri",
-    842: "Pierre Gasly",
-    839: "Esteban Ocon",
-    76: "Kevin Magnussen",
-    807: "Nico Hülkenberg",
-    848: "Alex Albon",
-    858: "Logan Sargeant",
-    822: "Valtteri Bottas",
-    855: "Guanyu Zhou",
-    817: "Daniel Ricciardo",
-    852: "Yuki Tsunoda"
-}
-
-general_ratings = {
-    "Max Verstappen": 91, 
-    "Sergio Pérez": 88, 
-    "Charles Leclerc": 89, 
-    "Carlos Sainz": 88, 
-    "Lewis Hamilton": 87, 
-    "George Russell": 86, 
-    "Fernando Alonso": 85, 
-    "Lando Norris": 90, 
-    "Oscar Piastri": 82, 
-    "Pierre Gasly": 84, 
-    "Esteban Ocon": 83, 
-    "Kevin Magnussen": 78, 
-    "Nico Hülkenberg": 80, 
-    "Alex Albon": 82, 
-    "Logan Sargeant": 70, 
-    "Valtteri Bottas": 80, 
-    "Guanyu Zhou": 75, 
-    "Daniel Ricciardo": 81, 
-    "Yuki Tsunoda": 78,
-    "Lance Stroll": 75
-}
-
-average_starting_positions = {
-    "Max Verstappen": 4.00, 
-    "Sergio Pérez": 7.20, 
-    "Charles Leclerc": 5.80, 
-    "Carlos Sainz": 6.50, 
-    "Lewis Hamilton": 4.00, 
-    "George Russell": 8.50, 
-    "Fernando Alonso": 7.80, 
-    "Lando Norris": 6.00, 
-    "Oscar Piastri": 8.00, 
-    "Pierre Gasly": 9.50, 
-    "Esteban Ocon": 10.00, 
-    "Kevin Magnussen": 12.00, 
-    "Nico Hülkenberg": 11.00, 
-    "Alex Albon": 10.50, 
-    "Logan Sargeant": 18.00, 
-    "Valtteri Bottas": 7.00, 
-    "Guanyu Zhou": 16.00, 
-    "Daniel Ricciardo": 9.00, 
-    "Yuki Tsunoda": 13.00,
-    "Lance Stroll": 14.50
-}
-
-average_finish_position = {
-    "Max Verstappen": 4.80,
-    "Sergio Pérez": 6.50,
-    "Charles Leclerc": 5.50,
-    "Carlos Sainz": 6.20,
-    "Lewis Hamilton": 5.00,
-    "George Russell": 9.00,
-    "Fernando Alonso": 7.50,
-    "Lando Norris": 5.80,
-    "Oscar Piastri": 8.50,
-    "Pierre Gasly": 10.50,
-    "Esteban Ocon": 11.20,
-    "Kevin Magnussen": 13.00,
-    "Nico Hülkenberg": 11.50,
-    "Alex Albon": 10.80,
-    "Logan Sargeant": 19.00,
-    "Valtteri Bottas": 7.50,
-    "Guanyu Zhou": 17.50,
-    "Daniel Ricciardo": 9.80,
-    "Yuki Tsunoda": 14.00,
-    "Lance Stroll": 15.00
-}
-
-weather_conditions = {
-    "Australie (Melbourne)": {"condition": "Averses", "temp_min": 11, "temp_max": 12},
-    "Chine (Shanghai)": {"condition": "Orage", "temp_min": 27, "temp_max": 28},
-    "Japon (Suzuka)": {"condition": "Nuageux", "temp_min": 28, "temp_max": 31},
-    "Bahreïn (Sakhir)": {"condition": "Ciel clair", "temp_min": 30, "temp_max": 38},
-}
+
+from f1sim.calendar import CIRCUIT_RACE_IDS
+from f1sim.charts import progress_figure
+from f1sim.drivers import CURRENT_DRIVERS
+from f1sim.lap_simulation import simulate_race_laps
+from f1sim.loader import load_temps_par_courses, preload
+from f1sim.monte_carlo import simulate_race_adaptive, simulate_race_batch
+from f1sim.paths import data_path
+from f1sim.race_index import load_race_index
+from f1sim.replay import load_lap_replay, race_positions, replay_figure
+from f1sim.season import driver_constructors, simulate_seasons
+from f1sim.simulation import circuit_weather, race_data
+from f1sim.spans import reset, show_panel, traced
+from f1sim.weather import condition_factors, weather_factor
+
+logo_path = data_path('F1-LOGO.png')
+
+temps_par_courses_path = data_path('temps_par_courses.csv')
+drivers_path = data_path('drivers.csv')
+qualifying_path = data_path('cleaned_qualifying.csv')
+weather_path = data_path('weather_meteo.csv')
+circuits_path = data_path('cleaned_circuits.csv')
+lap_times_path = data_path('cleaned_lap_times.csv')
+race_weather_path = data_path('race_weather.csv')
+# Tables lues par le simulateur, chargées en parallèle et en arrière-plan dès le premier affichage
+STARTUP_TABLES = [temps_par_courses_path, race_weather_path]
+
+# Calendrier partagé avec la ligne de commande (voir f1sim.calendar)
+circuit_mapping = CIRCUIT_RACE_IDS
+
+available_circuits = list(circuit_mapping.keys())
 
 def weather_influence(weather):
-    if "averse" in weather["condition"].lower() or "pluie" in weather["condition"].lower():
-        return 1.5
-    elif "nuageux" in weather["condition"].lower() or "instable" in weather["condition"].lower():
-        return 1.3
-    elif "ciel clair" in weather["condition"].lower() or "beau temps" in weather["condition"].lower():
-        return 1.0
-    else:
-        return 1.05
+    # Catégorie de la condition (pluie, nuageux, clair, autre) et facteur associé : voir f1sim.weather
+    return weather_factor(weather["condition"])
 
-def simulate_race_with_probability_and_weather(race_id, circuit_name, weather_df, circuits_df):
-    temps_par_courses_df['Nom du pilote'] = temps_par_courses_df['driverid'].map(driver_mapping)
-    
-    race_results = temps_par_courses_df[temps_par_courses_df['race_id'] == race_id]
-    
-    race_data = pd.DataFrame({
-        'Nom du pilote': list(general_ratings.keys()),
-        'Rating': list(general_ratings.values()),
-        'Average_start': [average_starting_positions[pilote] for pilote in general_ratings.keys()],
-        'Average_finish': [average_finish_position[pilote] for pilote in general_ratings.keys()]
-    })
+def driver_names():
+    return race_data().name_mapping()
+
+@traced()
+def simulate_race_with_probability_and_weather(race_id, circuit_name, weather_df=None, circuits_df=None):
+    drivers = race_data().to_frame()
     
-    weather = weather_conditions.get(circuit_name, {"condition": "Ciel clair", "temp_min": 20, "temp_max": 25})
+    weather = circuit_weather(circuit_name)
     
     influence_factor = weather_influence(weather)
     
-    variability_factor = np.random.uniform(0.8, 1.2, len(race_data))
+    variability_factor = np.random.uniform(0.8, 1.2, len(drivers))
     
-    race_data['Position de départ'] = race_data['Average_start'] * (100 - race_data['Rating']) / 100 * influence_factor * variability_factor
-    race_data['Position finale'] = race_data['Average_finish'] * (100 - race_data['Rating']) / 100 * influence_factor * variability_factor
+    drivers['Position de départ'] = drivers['Average_start'] * (100 - drivers['Rating']) / 100 * influence_factor * variability_factor
+    drivers['Position finale'] = drivers['Average_finish'] * (100 - drivers['Rating']) / 100 * influence_factor * variability_factor
     
-    race_data = race_data.sort_values('Position de départ').reset_index(drop=True)
-    race_data['Position de départ'] = range(1, len(race_data) + 1)
+    drivers = drivers.sort_values('Position de départ').reset_index(drop=True)
+    drivers['Position de départ'] = range(1, len(drivers) + 1)
     
-    race_data = race_data.sort_values('Position finale').reset_index(drop=True)
-    race_data['Position finale'] = range(1, len(race_data) + 1)
+    drivers = drivers.sort_values('Position finale').reset_index(drop=True)
+    drivers['Position finale'] = range(1, len(drivers) + 1)
 
-    return race_data[['Nom du pilote', 'Position de départ', 'Position finale']], weather
+    return drivers[['Nom du pilote', 'Position de départ', 'Position finale']], weather
 
+@traced()
 def generate_dynamic_race_graph(simulated_race_results):
-    fig = go.Figure()
-
-    race_progress = np.linspace(0, 100, 10)
-    
-    for i, row in simulated_race_results.iterrows():
-        start_position = row['Position de départ']
-        end_position = row['Position finale']
-        
-        initial_position = np.linspace(start_position, end_position, len(race_progress))
-        position_progress = initial_position
-        
-        fig.add_trace(go.Scatter(
-            x=race_progress,
-            y=position_progress,
-            mode='lines+markers',
-            name=row['Nom du pilote']
-        ))
-
-    fig.update_layout(
-        title="Simulation dynamique de la course avec dépassements",
-        xaxis_title="Progression de la course (%)",
-        yaxis_title="Position",
-        yaxis=dict(
-            tickmode='array',
-            tickvals=list(range(1, 21)),
-            autorange="reversed"
-        ),
-        xaxis=dict(
-            range=[0, 100]
-        ),
-        showlegend=True
-    )
-
-    return fig
-
-circuit_mapping = {
-    "Bahreïn (Sakhir)": 1098,
-    "Australie (Melbourne)": 1099,
-    "Chine (Shanghai)": 1100,
-    "Japon (Suzuka)": 1101,
-    "Arabie saoudite (Djeddah)": 1102,
-    "Miami (Floride)": 1103,
-    "Emilie Romagne (Imola – Italie)": 1104,
-    "Monaco (Monte-Carlo)": 1105,
-    "Espagne (Barcelone)": 1106,
-    "Canada (Montréal)": 1107,
-    "Autriche (Spielberg)": 1108,
-    "Royaume-Uni (Silverstone)": 1109,
-    "Hongrie (Budapest)": 1110,
-    "Grand Prix de Belgique (Spa-Francorchamps)": 1111,
-    "Pays-Bas (Zandvoort)": 1112,
-    "Italie (Monza)": 1113,
-    "Azerbaïdjan (Bakou)": 1114,
-    "Singapour (Marina Bay)": 1115,
-    "USA (Austin)": 1116,
-    "Mexique (Mexico City)": 1117,
-    "Brésil (São Paulo)": 1118,
-    "Las Vegas (Nevada)": 1119,
-    "Qatar (Doha)": 1120,
-    "Abu Dhabi (Yas Marina)": 1121
-}
+    # Tous les tracés sont construits en une passe à partir des colonnes (voir f1sim.charts)
+    return progress_figure(simulated_race_results['Position de départ'].to_numpy(),
+                           simulated_race_results['Position finale'].to_numpy(),
+                           simulated_race_results['Nom du pilote'].tolist())
 
-available_circuits = list(circuit_mapping.keys())
+def main():
+    reset()
+    preload(STARTUP_TABLES)
+    # st.image lit le fichier directement : pas besoin d'importer PIL avant le premier affichage
+    st.image(logo_path, width=300, caption="Simulation Formule 1")
 
-st.title('Simulation de Course F1 avec Influence des Notes Générales et Conditions Météorologiques')
+    st.title('Simulation de Course F1 avec Influence des Notes Générales et Conditions Météorologiques')
 
-selected_circuit = st.selectbox("Choisissez un circuit", available_circuits)
+    selected_circuit = st.selectbox("Choisissez un circuit", available_circuits)
 
-selected_race_id = circuit_mapping[selected_circuit]
+    selected_race_id = circuit_mapping[selected_circuit]
 
-if st.button("Simuler la course"):
-    simulated_race_results, weather = simulate_race_with_probability_and_weather(selected_race_id, selected_circuit, weather_df, circuits_df)
+    if st.button("Simuler la course"):
+        simulated_race_results, weather = simulate_race_with_probability_and_weather(selected_race_id, selected_circuit)
+    
+        st.subheader(f"Résultats simulés de la course : {selected_circuit}")
+        st.dataframe(simulated_race_results[['Nom du pilote', 'Position de départ', 'Position finale']])
+    
+        st.markdown(f"**Conditions météo :** {weather['condition']}, Température min : {weather['temp_min']}°C, Température max : {weather['temp_max']}°C")
+    
+        race_graph = generate_dynamic_race_graph(simulated_race_results)
+    
+        st.plotly_chart(race_graph)
+
+    if st.button("Rejouer la course réelle"):
+        try:
+            lap_replay = load_lap_replay(lap_times_path)
+        except FileNotFoundError:
+            # Temps au tour nettoyés pas encore produits par clean.py
+            lap_replay = None
+        real_positions = None if lap_replay is None else race_positions(lap_replay, selected_race_id)
+        if lap_replay is None:
+            st.info("Temps au tour nettoyés introuvables : lancez d'abord le nettoyage (python clean.py --all).")
+        elif real_positions is None:
+            st.info("Pas de temps au tour disponibles pour cette course.")
+        else:
+            st.plotly_chart(replay_figure(real_positions, driver_names()))
+
+    st.subheader("Probabilités sur un grand nombre de courses")
+
+    n_simulations = st.number_input("Nombre de simulations", min_value=1000, max_value=1_000_000, value=100_000, step=10_000)
+
+    adaptive = st.checkbox("Arrêt automatique à la précision voulue", value=False)
+    tolerance = st.number_input("Précision (demi-largeur de l'intervalle à 95 % sur victoire et podium)",
+                                min_value=0.0005, max_value=0.05, value=0.005, step=0.0005, format="%.4f",
+                                disabled=not adaptive)
+
+    if st.button("Lancer les simulations"):
+        weather = circuit_weather(selected_circuit)
+        if adaptive:
+            # n_simulations sert alors de plafond
+            batch = simulate_race_adaptive(race_data(), weather_influence(weather), tolerance,
+                                           max_simulations=int(n_simulations))
+        else:
+            batch = simulate_race_batch(race_data(), weather_influence(weather), int(n_simulations))
     
-    st.subheader(f"Résultats simulés de la course : {selected_circuit}")
-    st.dataframe(simulated_race_results[['Nom du pilote', 'Position de départ', 'Position finale']])
+        st.markdown(f"**Conditions météo :** {weather['condition']}")
+        st.dataframe(batch['summary'].round(3))
     
-    st.markdown(f"**Conditions météo :** {weather['condition']}, Température min : {weather['temp_min']}°C, Température max : {weather['temp_max']}°C")
+        st.write("Probabilité de chaque position finale :")
+        st.dataframe(batch['finish_probabilities'].round(3))
     
-    race_graph = generate_dynamic_race_graph(simulated_race_results)
+        st.caption(f"{batch['n_simulations']:,} courses simulées en {batch['seconds']:.2f} s "
+                   f"({batch['races_per_second']:,.0f} courses/s)")
     
-    st.plotly_chart(race_graph)
+        if adaptive:
+            status = "atteinte" if batch['converged'] else "non atteinte (plafond de simulations)"
+            st.write(f"Précision {status} : ±{batch['half_width']:.4f}")
+            st.write("Convergence des probabilités de victoire :")
+            st.line_chart(batch['history'].drop(columns='Demi-largeur max'))
+            st.line_chart(batch['history']['Demi-largeur max'])
+
+    st.subheader("Simulation de la saison complète")
+
+    n_seasons = st.number_input("Nombre de saisons", min_value=100, max_value=200_000, value=5_000, step=1_000)
+
+    if st.button("Simuler la saison"):
+        drivers = race_data()
+        teams = driver_constructors(load_temps_par_courses(temps_par_courses_path), drivers.name_mapping())
+        influence_factors = condition_factors([circuit_weather(circuit)["condition"] for circuit in available_circuits])
+        season = simulate_seasons(drivers, [teams.get(pilote, "Inconnue") for pilote in drivers.names],
+                                  influence_factors, int(n_seasons))
+    
+        st.write(f"Championnat pilotes ({len(influence_factors)} courses) :")
+        st.dataframe(season['drivers'].round(3))
+    
+        st.write("Championnat constructeurs :")
+        st.dataframe(season['constructors'].round(3))
+    
+        st.caption(f"{season['n_seasons']:,} saisons simulées en {season['seconds']:.2f} s "
+                   f"({season['seasons_per_second']:,.0f} saisons/s)")
+
+    st.subheader("Simulation tour par tour (arrêts aux stands, voiture de sécurité, météo)")
+
+    n_lap_runs = st.number_input("Nombre de courses simulées tour par tour", min_value=100, max_value=100_000, value=10_000,
+                                 step=1_000)
+
+    if st.button("Simuler tour par tour"):
+        weather = circuit_weather(selected_circuit)
+        lap_race = simulate_race_laps(load_temps_par_courses(temps_par_courses_path), selected_race_id,
+                                      CURRENT_DRIVERS, driver_names(), weather_influence(weather),
+                                      int(n_lap_runs),
+                                      race_results=load_race_index(temps_par_courses_path).race(selected_race_id))
+    
+        st.markdown(f"**Conditions météo :** {weather['condition']}")
+        st.dataframe(lap_race['summary'].round(3))
+    
+        st.write("Déroulement de la première course simulée :")
+        st.plotly_chart(replay_figure(lap_race['lap_positions']))
+    
+        st.caption(f"{int(n_lap_runs):,} courses simulées en {lap_race['seconds']:.2f} s "
+                   f"({lap_race['races_per_second']:,.0f} courses/s)")
+
+    show_panel()
 
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
-import pandas as pd
-import numpy as np
 import streamlit as st
 import plotly.express as px
 
+from f1sim.analytics import history_paths, history_stats
+from f1sim.history import season_views
+from f1sim.loader import load_combined, load_computed
+from f1sim.spans import reset, show_panel, span, traced
+
+SEASON_TABLES = ['cleaned_races.csv', 'cleaned_results.csv', 'cleaned_seasons.csv', 'cleaned_constructors.csv',
+                 'cleaned_drivers.csv']
+
 def load_data():
     try:
-        races_df = pd.read_csv('cleaned_races.csv')
-        results_df = pd.read_csv('cleaned_results.csv')
-        seasons_df = pd.read_csv('cleaned_seasons.csv')
-        constructors_df = pd.read_csv('cleaned_constructors.csv')
-        drivers_df = pd.read_csv('cleaned_drivers.csv')
+        # Tables et vues par saisons construites une fois, puis servies depuis le cache tant que les fichiers
+        # ne changent pas (voir f1sim.history)
+        views = load_combined(SEASON_TABLES, season_views)
+        races_df, results_df, seasons_df, constructors_df, drivers_df = views.sources
         return races_df, results_df, seasons_df, constructors_df, drivers_df
     except FileNotFoundError as e:
         st.error(f"Erreur lors du chargement des fichiers : {e}")
         return None, None, None, None, None
 
+@traced()
 def filter_data_for_seasons(races_df, results_df, seasons_df, constructors_df, drivers_df, years):
     if races_df is None or results_df is None or seasons_df is None:
         st.error("Données manquantes pour le filtrage.")
@@ -36,58 +42,30 @@ def filter_data_for_seasons(races_df, results_df, seasons_df, constructors_df, d
         st.error("Colonnes manquantes dans results_df.")
         return None, None
 
-    # Fusionner les DataFrames pour obtenir les noms des pilotes et des constructeurs
-    results_with_names = results_df.merge(drivers_df[['driverid', 'forename', 'surname']],
-                                          left_on='driverid', right_on='driverid', how='left')
-    results_with_names = results_with_names.merge(constructors_df[['constructorid', 'name']],
-                                                  left_on='constructorid', right_on='constructorid', how='left')
-
-    # Renommer les colonnes pour la création des graphiques
-    results_with_names = results_with_names.rename(columns={
-        'name': 'name_constructor',
-        'forename': 'driver_forename',
-        'surname': 'driver_surname'
-    })
-
-    simulated_races_list = []
-    for year in years:
-        num_races = 23
-        simulated_races = pd.DataFrame({
-            'raceid': range(max(races_df['raceid'].max() + 1, 1), max(races_df['raceid'].max() + 1, 1) + num_races),
-            'year': [year] * num_races,
-            'round': range(1, num_races + 1),
-            'circuitid': range(1, num_races + 1),
-            'name': [f"Race {i}" for i in range(1, num_races + 1)],
-            'date': pd.date_range(start=f'{year}-01-01', periods=num_races, freq='W'),
-            'time': ['15:00:00'] * num_races,
-            'url': [f"http://en.wikipedia.org/wiki/{year}_Race_{i}" for i in range(1, num_races + 1)],
-            'fp1_date': [np.nan] * num_races,
-            'fp1_time': [np.nan] * num_races,
-            'fp2_date': [np.nan] * num_races,
-            'fp2_time': [np.nan] * num_races,
-            'fp3_date': [np.nan] * num_races,
-            'fp3_time': [np.nan] * num_races,
-            'quali_date': [np.nan] * num_races,
-            'quali_time': [np.nan] * num_races,
-            'sprint_date': [np.nan] * num_races,
-            'sprint_time': [np.nan] * num_races
-        })
-        simulated_races_list.append(simulated_races)
-
-    races_df_simulated = pd.concat([races_df] + simulated_races_list, ignore_index=True)
-
-    seasons_filtered = seasons_df[seasons_df['year'].isin(years)]
-    if seasons_filtered.empty:
+    # Résultats avec les noms des pilotes et des constructeurs, construits une fois pour ces tables
+    with span('résultats avec noms'):
+        views = season_views(races_df, results_df, seasons_df, constructors_df, drivers_df)
+
+    if not views.has_seasons(years):
         st.warning(f"Aucune donnée pour les saisons {years} trouvée dans seasons_df.")
         return None, None
 
-    races_filtered = races_df_simulated[races_df_simulated['year'].isin(years)]
-    results_filtered = results_with_names[results_with_names['raceid'].isin(races_filtered['raceid'])]
+    # Courses (avec le calendrier de remplacement) et résultats des saisons, mémorisés par tuple d'années
+    with span('filtrage des saisons'):
+        races_filtered, results_filtered = views.select(years)
 
     return races_filtered, results_filtered
 
-def create_plots(races_df, results_df):
-    results_by_constructor = results_df.groupby('name_constructor')['points'].sum().reset_index()
+@traced()
+def create_plots(races_df, results_df, totals=None):
+    # totals : (points par constructeur, points par pilote) tirés du cube des points (SeasonViews.totals) ;
+    # à défaut, ils sont recalculés sur results_df
+    if totals is None:
+        results_by_constructor = results_df.groupby('name_constructor', observed=True)['points'].sum().reset_index()
+        results_by_driver = (results_df.groupby(['driver_forename', 'driver_surname'], observed=True)['points'].sum()
+                             .reset_index())
+    else:
+        results_by_constructor, results_by_driver = totals
     fig_constructor_points = px.bar(
         results_by_constructor,
         x='name_constructor',
@@ -98,7 +76,6 @@ def create_plots(races_df, results_df):
     )
     fig_constructor_points.update_traces(texttemplate='%{text:.2s}', textposition='outside')
 
-    results_by_driver = results_df.groupby(['driver_forename', 'driver_surname'])['points'].sum().reset_index()
     fig_driver_points = px.bar(
         results_by_driver,
         x='driver_forename',
@@ -111,7 +88,27 @@ def create_plots(races_df, results_df):
 
     return fig_constructor_points, fig_driver_points
 
+def show_history_stats():
+    # Toutes les saisons : résultats et temps au tour lus par blocs (voir f1sim.analytics), sans charger les tables
+    # entières ; recalculé seulement si l'un des fichiers change
+    try:
+        stats = load_computed(history_paths(), history_stats)
+    except FileNotFoundError as e:
+        st.error(f"Erreur lors du chargement des fichiers : {e}")
+        return
+
+    st.write("Carrières des pilotes (toutes saisons) :")
+    st.dataframe(stats['careers'].sort_values('points', ascending=False), hide_index=True)
+
+    st.write("Points par saison et par constructeur :")
+    st.dataframe(stats['constructor_seasons'].sort_values(['year', 'points'], ascending=[False, False]),
+                 hide_index=True)
+
+    st.write("Statistiques par circuit et par pilote :")
+    st.dataframe(stats['circuits'], hide_index=True)
+
 def main():
+    reset()
     races_df, results_df, seasons_df, constructors_df, drivers_df = load_data()
 
     if any(df is None for df in [races_df, results_df, seasons_df, constructors_df, drivers_df]):
@@ -128,98 +125,17 @@ def main():
         st.write("Résultats en 2023 et 2024:")
         st.dataframe(results_filtered)
 
-        fig_constructor_points, fig_driver_points = create_plots(races_filtered, results_filtered)
+        # Totaux cumulés à partir du cube des points des vues déjà construites
+        totals = season_views(races_df, results_df, seasons_df, constructors_df, drivers_df).totals(years)
+        fig_constructor_points, fig_driver_points = create_plots(races_filtered, results_filtered, totals)
 
         st.plotly_chart(fig_constructor_points)
         st.plotly_chart(fig_driver_points)
 
-if __name__ == "__main__":
-    main()
-
-def filter_data_for_seasons(races_df, results_df, seasons_df, constructors_df, drivers_df, years):
-    races_filtered = races_df[races_df['year'].isin(years)]
-    results_filtered = results_df[results_df['raceid'].isin(races_filtered['raceid'])]
-    return races_filtered, results_filtered
-
-# Example function for creating plots
-def create_plots(races_filtered, results_filtered):
-    fig_constructor_points = px.bar(
-        results_filtered, 
-        x='constructor', 
-        y='points', 
-        title='Points par constructeur'
-    )
-    
-    fig_driver_points = px.bar(
-        results_filtered, 
-        x='driver', 
-        y='points', 
-        title='Points par pilote'
-    )
-    
-    return fig_constructor_points, fig_driver_points
-
-# Function for additional plots
-def create_additional_plots(results_filtered):
-    fig_avg_speed = px.line(
-        results_filtered, 
-        x='raceid', 
-        y='average_speed', 
-        title='Vitesse moyenne par course'
-    )
-    
-    fig_finish_time = px.line(
-        results_filtered, 
-        x='raceid', 
-        y='finish_time', 
-        title='Temps d\'arrivée moyen par course'
-    )
-    
-    return fig_avg_speed, fig_finish_time
+    if st.sidebar.checkbox("Statistiques sur tout l'historique"):
+        show_history_stats()
 
-# Main function
-def main():
-    # Sample DataFrames (replace with your actual data loading logic)
-    races_df = pd.DataFrame({
-        'raceid': [1, 2, 3],
-        'year': [2023, 2024, 2024]
-    })
-
-    results_df = pd.DataFrame({
-        'raceid': [1, 2, 3],
-        'constructor': ['Mercedes', 'Red Bull', 'Ferrari'],
-        'driver': ['Hamilton', 'Verstappen', 'Leclerc'],
-        'points': [25, 18, 15],
-        'average_speed': [220.5, 221.0, 222.3],
-        'finish_time': [90.2, 91.5, 89.7]
-    })
-
-    seasons_df = pd.DataFrame()
-    constructors_df = pd.DataFrame()
-    drivers_df = pd.DataFrame()
+    show_panel()
 
-    years = [2023, 2024]
-
-    # Filter the data
-    races_filtered, results_filtered = filter_data_for_seasons(races_df, results_df, seasons_df, constructors_df, drivers_df, years)
-
-    if races_filtered is not None and results_filtered is not None:
-        st.write("Courses en 2023 et 2024:")
-        st.dataframe(races_filtered)
-
-        st.write("Résultats en 2023 et 2024:")
-        st.dataframe(results_filtered)
-
-        # Create and display the first set of plots
-        fig_constructor_points, fig_driver_points = create_plots(races_filtered, results_filtered)
-        st.plotly_chart(fig_constructor_points)
-        st.plotly_chart(fig_driver_points)
-
-        # Create and display additional plots
-        fig_avg_speed, fig_finish_time = create_additional_plots(results_filtered)
-        st.plotly_chart(fig_avg_speed)
-        st.plotly_chart(fig_finish_time)
-
-# Run the app
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()